@@ -0,0 +1,60 @@
+import argparse
+import json
+import time
+
+import harness  # sets up sys.path and core.secrets
+from core.serializer import BACKENDS
+from fixtures import make_daily_data, make_profile
+
+
+def bench(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def run(iterations: int) -> list:
+    payloads = {
+        "daily_data (1k users)": make_daily_data(1000),
+        "daily_data (10k users)": make_daily_data(10000),
+        "profile (5 profiles x 3 members)": make_profile(5, 3)
+    }
+    results = []
+    for payload_name, payload in payloads.items():
+        for backend, (dumps, loads) in BACKENDS.items():
+            compact = dumps(payload)
+            pretty = dumps(payload, pretty=True)
+            results.append({
+                "payload": payload_name,
+                "backend": backend,
+                "dumps_ms": bench(lambda: dumps(payload), iterations),
+                "dumps_pretty_ms": bench(lambda: dumps(payload, pretty=True), iterations),
+                "loads_ms": bench(lambda: loads(compact), iterations),
+                "compact_bytes": len(compact),
+                "pretty_bytes": len(pretty)
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON serializer backends on realistic payloads")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+
+    print(f"{'payload':<34} {'backend':<8} {'dumps':>9} {'pretty':>9} {'loads':>9} {'compact':>12} {'pretty':>12}")
+    for r in results:
+        print(f"{r['payload']:<34} {r['backend']:<8} {r['dumps_ms']:>7.2f}ms {r['dumps_pretty_ms']:>7.2f}ms {r['loads_ms']:>7.2f}ms "
+              f"{r['compact_bytes']:>10,}B {r['pretty_bytes']:>10,}B")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import json
+import random
+import time
+from pathlib import Path
+from core.config import DROP_IDS
+
+# real payloads saved by record_fixtures.py, replayed instead of the generated ones when present
+RECORDED_DIR = Path(__file__).parent / "recorded"
+
+CLASSES = ["archer", "berserk", "healer", "mage", "tank"]
+
+
+# shared is the fraction of users tracking a player someone else already tracks (alts, friends)
+def make_daily_data(users: int, shared: float = 0.0) -> dict:
+    rng = random.Random(42)
+    share_rng = random.Random(43)
+    now = int(time.time())
+    data = {
+        "users": {},
+        "daily_snapshots": {},
+        "monthly_snapshots": {},
+        "current_xp": {},
+        "last_daily_reset": now - 3600,
+        "last_monthly_reset": now - 86400 * 10,
+        "last_updated": now
+    }
+    for i in range(users):
+        user_id = str(300000000000000000 + i)
+        data["users"][user_id] = {"ign": f"Player{i}", "uuid": f"{rng.getrandbits(128):032x}"}
+        if i and share_rng.random() < shared:
+            data["users"][user_id] = dict(data["users"][str(300000000000000000 + share_rng.randrange(i))])
+        for key in ["current_xp", "daily_snapshots", "monthly_snapshots"]:
+            data[key][user_id] = {
+                "timestamp": now - rng.randint(0, 7200),
+                "cata_xp": rng.uniform(1e6, 6e8),
+                "classes": {cls: rng.uniform(1e5, 6e8) for cls in CLASSES}
+            }
+    return data
+
+
+def make_profile(profiles: int, members: int, uuid: str = None) -> dict:
+    rng = random.Random(7)
+    result = {"success": True, "profiles": []}
+    for p in range(profiles):
+        profile = {"profile_id": f"{rng.getrandbits(128):032x}", "cute_name": f"Profile{p}", "selected": p == 0, "members": {}}
+        for m in range(members):
+            member_uuid = f"{rng.getrandbits(128):032x}"
+            if uuid and m == 0:
+                member_uuid = uuid
+            profile["members"][member_uuid] = {
+                "player_data": {"perks": {"toxophilite": 5, "unbridled_rage": 3, "heart_of_gold": 2, "cold_efficiency": 4, "diamond_in_the_rough": 1}},
+                "dungeons": {
+                    "dungeon_types": {
+                        "catacombs": {
+                            "experience": rng.uniform(1e6, 6e8),
+                            "tier_completions": {str(t): rng.randint(0, 2000) for t in range(8)},
+                            "fastest_time": {str(t): rng.randint(60000, 600000) for t in range(8)},
+                            "best_score": {str(t): rng.randint(100, 317) for t in range(8)}
+                        },
+                        "master_catacombs": {
+                            "tier_completions": {str(t): rng.randint(0, 5000) for t in range(1, 8)},
+                            "fastest_time": {str(t): rng.randint(60000, 600000) for t in range(1, 8)}
+                        }
+                    },
+                    "player_classes": {cls: {"experience": rng.uniform(1e5, 6e8)} for cls in CLASSES},
+                    "treasures": {"runs": [{"run_id": f"{rng.getrandbits(64):016x}", "completion_ts": rng.getrandbits(40), "type": "master_catacombs", "tier": 7} for _ in range(50)]}
+                },
+                "inventory": {"inv_contents": {"type": 0, "data": "H4sIAAAAAAAAAO" + "A" * 4000}},
+                "collection": {f"ITEM_{i}": rng.randint(0, 10**7) for i in range(200)}
+            }
+        result["profiles"].append(profile)
+    return result
+
+
+def make_bazaar(products: int = 1500) -> dict:
+    rng = random.Random(11)
+    ids = [item_id for item_id in DROP_IDS.values()] + [f"PRODUCT_{i}" for i in range(products)]
+    data = {"success": True, "lastUpdated": int(time.time() * 1000), "products": {}}
+    for product_id in ids:
+        buy = rng.uniform(1, 5e8)
+        data["products"][product_id] = {
+            "product_id": product_id,
+            "sell_summary": [{"amount": rng.randint(1, 640), "pricePerUnit": buy * 0.98, "orders": rng.randint(1, 5)} for _ in range(10)],
+            "buy_summary": [{"amount": rng.randint(1, 640), "pricePerUnit": buy * 1.02, "orders": rng.randint(1, 5)} for _ in range(10)],
+            "quick_status": {
+                "productId": product_id,
+                "sellPrice": buy * 0.98,
+                "sellVolume": rng.randint(0, 10**6),
+                "sellMovingWeek": rng.randint(0, 10**7),
+                "sellOrders": rng.randint(0, 500),
+                "buyPrice": buy * 1.02,
+                "buyVolume": rng.randint(0, 10**6),
+                "buyMovingWeek": rng.randint(0, 10**7),
+                "buyOrders": rng.randint(0, 500)
+            }
+        }
+    return data
+
+
+def make_lbin(items: int = 5000) -> dict:
+    rng = random.Random(13)
+    data = {f"AUCTION_ITEM_{i}": rng.uniform(1000, 2e9) for i in range(items)}
+    for item_id in DROP_IDS.values():
+        data[item_id] = rng.uniform(1e6, 4e8)
+    return data
+
+
+def load_recorded(name: str):
+    path = RECORDED_DIR / f"{name}.json"
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def get_profile_fixture():
+    # (recorded uuid or None, payload)
+    recorded = load_recorded("profile")
+    if recorded:
+        return recorded["uuid"], recorded["data"]
+    return None, None
+
+
+def get_bazaar_fixture() -> dict:
+    return load_recorded("bazaar") or make_bazaar()
+
+
+def get_lbin_fixture() -> dict:
+    return load_recorded("lbin") or make_lbin()
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+try:
+    import core.secrets
+except ImportError:
+    # benchmarks never log in, core.config only needs the module to exist
+    secrets = types.ModuleType("core.secrets")
+    secrets.TOKEN = "benchmark"
+    sys.modules["core.secrets"] = secrets
+
+
+def use_scratch_dir() -> str:
+    # managers and the logger write to data/ and logs/ relative to the cwd, keep the real ones untouched.
+    # has to run before anything imports core.logger or the services
+    path = tempfile.mkdtemp(prefix="rtca-bench-")
+    os.makedirs(os.path.join(path, "data"))
+    os.chdir(path)
+    return path
+
+
+def quiet_logs():
+    from core.logger import set_log_level
+    set_log_level("WARNING")
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def summarize(samples_ms: list) -> dict:
+    ordered = sorted(samples_ms)
+    count = len(ordered)
+
+    def pick(q: float) -> float:
+        return ordered[min(count - 1, int(q * count))]
+
+    return {
+        "samples": count,
+        "mean_ms": sum(ordered) / count,
+        "min_ms": ordered[0],
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1]
+    }
+
+
+def time_sync(func, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+async def time_async(func, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import harness  # sets up sys.path and core.secrets
+from fixtures import make_daily_data
+
+DEFAULT_OUTPUT_DIR = harness.PROJECT_ROOT / "benchmarks" / "results"
+DEFAULT_MIX = "rtca=2,rng=3,daily=5"
+DAILY_BUTTONS = ["today_btn", "monthly_btn", "personal_btn", "next_btn", "prev_btn", "show_me_btn"]
+LAG_INTERVAL = 0.01
+
+
+# just enough of discord.Interaction for the cog handlers, nothing ever leaves the process
+class FakeUser:
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+
+    def __str__(self):
+        return self.name
+
+
+class FakeMessage:
+    async def edit(self, **kwargs):
+        return self
+
+
+class FakeResponse:
+    def __init__(self):
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _respond(self):
+        if self.done:
+            raise RuntimeError("interaction already responded to")
+        self.done = True
+
+    async def defer(self, **kwargs):
+        await self._respond()
+
+    async def send_message(self, *args, **kwargs):
+        await self._respond()
+
+    async def edit_message(self, **kwargs):
+        await self._respond()
+
+    async def send_modal(self, modal):
+        await self._respond()
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+        return FakeMessage()
+
+
+class FakeInteraction:
+    def __init__(self, user: FakeUser):
+        self.user = user
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+    async def edit_original_response(self, **kwargs):
+        return FakeMessage()
+
+    async def original_response(self):
+        return FakeMessage()
+
+
+class FakeBot:
+    latency = 0.0
+
+    async def fetch_user(self, user_id: int):
+        return FakeUser(user_id, f"User{user_id}")
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, (loop.time() - start - self.interval) * 1000))
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"rtca", "rng", "daily"}
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s) in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # peak rather than current, but still shows growth across the run
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return 0.0
+
+
+def take_memory_sample() -> dict:
+    gc.collect()
+    sample = {"rss_mb": rss_mb(), "objects": len(gc.get_objects())}
+    if tracemalloc.is_tracing():
+        sample["traced_mb"] = tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+    return sample
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.bot = FakeBot()
+        self.latencies = {}
+        self.errors = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def setup(self):
+        from modules.dungeons import Dungeons
+        from modules.rng import Rng
+        from services.daily_manager import daily_manager
+        from services.link_manager import link_manager
+        from services.rng_manager import rng_manager
+
+        await rng_manager.initialize()
+        # the same users end up linked, tracked and on the leaderboard, so nothing registers mid-run
+        daily_manager.set_data(make_daily_data(self.args.users))
+        self.users = []
+        for user_id, info in daily_manager.data["users"].items():
+            link_manager.links[user_id] = info["ign"]
+            self.users.append(FakeUser(int(user_id), info["ign"]))
+
+        self.dungeons = Dungeons(self.bot)
+        self.rng_cog = Rng(self.bot)
+
+    async def scenario_rtca(self, user: FakeUser):
+        floor = self.rng.choice(["M7", "M6", "M5"])
+        await self.dungeons.rtca.callback(self.dungeons, FakeInteraction(user), floor=floor)
+
+    async def scenario_rng(self, user: FakeUser):
+        await self.rng_cog.rng.callback(self.rng_cog, FakeInteraction(user))
+
+    async def scenario_daily(self, user: FakeUser):
+        from modules.leaderboard import DailyView
+
+        view = DailyView(user.id, user.name)
+        view._get_leaderboard_embed("daily")
+        for _ in range(self.args.clicks):
+            await getattr(view, self.rng.choice(DAILY_BUTTONS))(FakeInteraction(user))
+
+    async def _timed(self, name: str, user: FakeUser):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            await getattr(self, f"scenario_{name}")(user)
+        except Exception as e:
+            key = f"{name}: {type(e).__name__}: {e}"
+            self.errors[key] = self.errors.get(key, 0) + 1
+        finally:
+            self.latencies.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+            self.in_flight -= 1
+
+    async def run_phase(self, rate: float, duration: float, mix: dict):
+        # open loop: requests go out on schedule whether or not earlier ones have finished
+        loop = asyncio.get_running_loop()
+        names = list(mix)
+        weights = [mix[n] for n in names]
+        total = int(rate * duration)
+        start = loop.time()
+        tasks = []
+        for i in range(total):
+            delay = start + i / rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = self.rng.choices(names, weights)[0]
+            tasks.append(asyncio.create_task(self._timed(name, self.rng.choice(self.users))))
+        await asyncio.gather(*tasks)
+        return loop.time() - start
+
+
+def summarize_results(test: LoadTest, lag: LoopLagMonitor, elapsed: float, memory: dict, mock) -> dict:
+    scenarios = {name: harness.summarize(samples) for name, samples in test.latencies.items()}
+    completed = sum(len(samples) for samples in test.latencies.values())
+    return {
+        "requests": completed,
+        "elapsed_s": elapsed,
+        "throughput_rps": completed / elapsed if elapsed else 0.0,
+        "max_in_flight": test.max_in_flight,
+        "scenarios": scenarios,
+        "errors": test.errors,
+        "loop_lag": harness.summarize(lag.samples) if lag.samples else None,
+        "memory": memory,
+        "upstream_requests": dict(mock.requests)
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{report['requests']:,} interactions in {report['elapsed_s']:.1f}s "
+          f"({report['throughput_rps']:.1f}/s, up to {report['max_in_flight']} in flight)\n")
+    print(f"{'scenario':<10} {'count':>7} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    for name, s in sorted(report["scenarios"].items()):
+        print(f"{name:<10} {s['samples']:>7,} {s['p50_ms']:>8.1f}ms {s['p95_ms']:>8.1f}ms {s['p99_ms']:>8.1f}ms {s['max_ms']:>8.1f}ms")
+
+    lag = report["loop_lag"]
+    if lag:
+        print(f"\nEvent loop lag: p50 {lag['p50_ms']:.1f}ms • p95 {lag['p95_ms']:.1f}ms • p99 {lag['p99_ms']:.1f}ms • max {lag['max_ms']:.1f}ms")
+
+    before, after = report["memory"]["before"], report["memory"]["after"]
+    print(f"Memory (after gc): RSS {before['rss_mb']:.1f}MB → {after['rss_mb']:.1f}MB ({after['rss_mb'] - before['rss_mb']:+.1f}MB), "
+          f"objects {before['objects']:,} → {after['objects']:,} ({after['objects'] - before['objects']:+,})")
+    if "traced_mb" in after:
+        print(f"Traced: {after['traced_mb'] - before['traced_mb']:+.1f}MB retained, {report['memory']['traced_peak_mb']:.1f}MB peak")
+
+    print(f"Upstream requests: {report['upstream_requests']}")
+    for error, count in sorted(report["errors"].items(), key=lambda item: -item[1]):
+        print(f"  {count}x {error}")
+
+
+async def run(args) -> dict:
+    from mock_upstream import MockUpstream
+
+    mock = await MockUpstream(latency_ms=args.latency_ms).start()
+    mock.patch_api()
+    try:
+        test = LoadTest(args)
+        await test.setup()
+        mix = parse_mix(args.mix)
+
+        # warm the caches so the measured phase isn't dominated by the first fetch of every profile
+        if args.warmup:
+            await test.run_phase(args.rate, args.warmup, mix)
+            test.latencies.clear()
+            test.errors.clear()
+            test.max_in_flight = 0
+
+        if args.tracemalloc:
+            tracemalloc.start()
+        memory = {"before": take_memory_sample()}
+
+        lag = LoopLagMonitor()
+        lag.start()
+        elapsed = await test.run_phase(args.rate, args.duration, mix)
+        await lag.stop()
+
+        memory["after"] = take_memory_sample()
+        if args.tracemalloc:
+            memory["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+
+        return summarize_results(test, lag, elapsed, memory, mock)
+    finally:
+        await mock.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the cog handlers with fake interactions against a local mock of the upstream APIs")
+    parser.add_argument("--rate", type=float, default=50, help="interactions started per second")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds of unmeasured load first (0 to skip)")
+    parser.add_argument("--users", type=int, default=500, help="distinct linked users sending interactions")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--clicks", type=int, default=3, help="leaderboard button presses per daily scenario")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="artificial latency added by the mock upstream")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also trace python allocations (slows everything down a lot, latencies aren't comparable)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/load-<timestamp>.json)")
+    args = parser.parse_args()
+
+    output = Path(args.output).resolve() if args.output else DEFAULT_OUTPUT_DIR / f"load-{time.strftime('%Y%m%d-%H%M%S')}.json"
+
+    harness.use_scratch_dir()
+    harness.quiet_logs()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            "timestamp": int(time.time()),
+            "commit": harness.get_git_commit(),
+            "python": platform.python_version(),
+            "args": vars(args),
+            **report
+        }, f, indent=4)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
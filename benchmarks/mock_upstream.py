@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import json
+from aiohttp import web
+from fixtures import make_profile, get_profile_fixture, get_bazaar_fixture, get_lbin_fixture
+
+PLACEHOLDER_UUID = "f" * 32
+
+
+def name_to_uuid(name: str) -> str:
+    return hashlib.md5(name.lower().encode()).hexdigest()
+
+
+# local stand-in for playerdb, the profile worker, the Bazaar and moulberry
+class MockUpstream:
+    def __init__(self, latency_ms: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency_ms / 1000
+        self.host = host
+        self.port = port
+        self.requests = {}
+        self.runner = None
+
+        recorded_uuid, profile = get_profile_fixture()
+        if profile is None:
+            recorded_uuid, profile = PLACEHOLDER_UUID, make_profile(3, 2, uuid=PLACEHOLDER_UUID)
+        # serialize once, every request only swaps the member uuid in
+        self.profile_body = json.dumps(profile).encode()
+        self.profile_uuid = recorded_uuid.encode()
+        self.bazaar_body = json.dumps(get_bazaar_fixture()).encode()
+        self.lbin_body = json.dumps(get_lbin_fixture()).encode()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/api/player/minecraft/{name}", self._player)
+        app.router.add_get("/v2/skyblock/profiles", self._profile)
+        app.router.add_get("/skyblock/bazaar", self._bazaar)
+        app.router.add_get("/auction_averages_lbin/3day.json", self._lbin)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        self.port = self.runner.addresses[0][1]
+        return self
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def patch_api(self):
+        from services import api
+        from services.profile_backends import WorkerBackend, profile_backends
+        api.PLAYERDB_URL = self.base_url + "/api/player/minecraft/{name}"
+        # only the worker, even if a real hypixel key is configured
+        profile_backends.backends = [WorkerBackend(self.base_url + "/v2/skyblock/profiles?uuid={uuid}")]
+        api.BAZAAR_URL = self.base_url + "/skyblock/bazaar"
+        api.AH_URL = self.base_url + "/auction_averages_lbin/3day.json"
+
+    async def _respond(self, route: str, body: bytes) -> web.Response:
+        self.requests[route] = self.requests.get(route, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.Response(body=body, content_type="application/json")
+
+    async def _player(self, request):
+        name = request.match_info["name"]
+        uuid = name_to_uuid(name)
+        body = {
+            "code": "player.found",
+            "success": True,
+            "data": {"player": {"username": name, "raw_id": uuid, "id": f"{uuid[:8]}-{uuid[8:12]}-{uuid[12:16]}-{uuid[16:20]}-{uuid[20:]}"}}
+        }
+        return await self._respond("playerdb", json.dumps(body).encode())
+
+    async def _profile(self, request):
+        uuid = request.query.get("uuid", "")
+        return await self._respond("profile", self.profile_body.replace(self.profile_uuid, uuid.encode()))
+
+    async def _bazaar(self, request):
+        return await self._respond("bazaar", self.bazaar_body)
+
+    async def _lbin(self, request):
+        return await self._respond("lbin", self.lbin_body)
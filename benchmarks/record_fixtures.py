@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+import json
+
+import harness  # sets up sys.path and core.secrets
+from fixtures import RECORDED_DIR
+
+
+async def record(ign: str):
+    harness.use_scratch_dir()
+    from services import api
+    from services.upstream import HEADERS
+
+    RECORDED_DIR.mkdir(exist_ok=True)
+
+    uuid = await api.get_uuid(ign)
+    if not uuid:
+        print(f"Could not resolve {ign}")
+        return
+    profile = await api.get_profile_data(uuid)
+    if profile:
+        with open(RECORDED_DIR / "profile.json", 'w') as f:
+            json.dump({"uuid": uuid, "data": profile}, f)
+        print(f"Recorded profile for {ign} ({uuid})")
+
+    # the getters only keep what they use, so grab the raw payloads directly
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        for name, url in [("bazaar", api.BAZAAR_URL), ("lbin", api.AH_URL)]:
+            async with session.get(url, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=30)) as r:
+                if r.status != 200:
+                    print(f"Failed to record {name} ({r.status})")
+                    continue
+                with open(RECORDED_DIR / f"{name}.json", 'wb') as f:
+                    f.write(await r.read())
+                print(f"Recorded {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record live upstream payloads for the offline benchmarks")
+    parser.add_argument("ign", help="player whose profile gets recorded")
+    args = parser.parse_args()
+    asyncio.run(record(args.ign))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+from pathlib import Path
+
+import harness  # sets up sys.path and core.secrets
+from fixtures import make_daily_data
+
+DEFAULT_OUTPUT_DIR = harness.PROJECT_ROOT / "benchmarks" / "results"
+CLASSES = ["archer", "berserk", "healer", "mage", "tank"]
+
+
+def bench_simulation(iterations: int) -> list:
+    from core.config import FLOOR_XP_MAP
+    from services.simulation_logic import simulate_to_level_all50
+    from services.xp_calculations import get_total_xp_for_level
+
+    starts = {
+        "fresh": {cls: 0.0 for cls in CLASSES},
+        "cata_40": {cls: get_total_xp_for_level(40) for cls in CLASSES},
+        "unbalanced": {"archer": get_total_xp_for_level(50), "berserk": get_total_xp_for_level(45), "healer": get_total_xp_for_level(30),
+                       "mage": get_total_xp_for_level(48), "tank": get_total_xp_for_level(20)}
+    }
+    bonuses = {"hecatomb": 0.02, "scarf_accessory": 0.06, "scarf_attribute": 0.2, "global": 1.0, "mayor": 1.0,
+               "class_boosts": {cls: 0.1 for cls in CLASSES}}
+
+    results = []
+    for floor in ["M7", "M5", "F7"]:
+        for start_name, classes in starts.items():
+            timing = harness.time_sync(lambda: simulate_to_level_all50(classes, FLOOR_XP_MAP[floor], bonuses), iterations)
+            results.append({"name": "simulate_to_level_all50", "params": {"floor": floor, "start": start_name}, **timing})
+    return results
+
+
+def bench_dungeon_level(iterations: int) -> list:
+    from services.xp_calculations import get_dungeon_level
+
+    rng = random.Random(1)
+    xps = [rng.uniform(0, 1e9) for _ in range(10000)]
+
+    def run():
+        for xp in xps:
+            get_dungeon_level(xp)
+
+    timing = harness.time_sync(run, iterations)
+    return [{"name": "get_dungeon_level", "params": {"calls": len(xps)}, **timing}]
+
+
+def bench_leaderboard(sizes: list, iterations: int) -> list:
+    from services.daily_manager import DailyManager
+
+    results = []
+    for size in sizes:
+        manager = DailyManager()
+        manager.set_data(make_daily_data(size))
+        for board in ["daily", "monthly"]:
+            # leaderboards are memoized per data_version, cold bumps it so every iteration does the real sort
+            def cold():
+                manager.data_version += 1
+                manager.get_leaderboard(board)
+
+            timing = harness.time_sync(cold, iterations)
+            results.append({"name": "DailyManager.get_leaderboard", "params": {"users": size, "type": board, "cache": "cold"}, **timing})
+            timing = harness.time_sync(lambda: manager.get_leaderboard(board), iterations)
+            results.append({"name": "DailyManager.get_leaderboard", "params": {"users": size, "type": board, "cache": "warm"}, **timing})
+    return results
+
+
+async def bench_rng_embed(iterations: int) -> list:
+    from core.config import RNG_DROPS, GLOBAL_DROPS
+    from modules.rng import RngView
+    from services.rng_manager import rng_manager
+
+    await rng_manager.initialize()
+    user_id = "1"
+    for floor, items in RNG_DROPS.items():
+        for i, item in enumerate(items):
+            rng_manager.data.setdefault(user_id, {}).setdefault(floor, {})[item] = i + 1
+    for item in GLOBAL_DROPS:
+        rng_manager.data[user_id].setdefault("Global", {})[item] = 2
+    run_counts = {floor: {"normal": 500, "master": 2000} for floor in RNG_DROPS}
+
+    view = RngView(user_id, "Benchmark", 1, run_counts, "Benchmark")
+    # first render fetches prices from the mock, everything after is the steady state
+    await view.get_embed()
+
+    results = []
+    states = [("overview", None, None), ("floor", "Floor 7 (Necron)", None), ("item", "Floor 7 (Necron)", "Necron's Handle")]
+    for state, floor, item in states:
+        view.current_floor, view.current_item = floor, item
+        timing = await harness.time_async(view.get_embed, iterations)
+        results.append({"name": "RngView.get_embed", "params": {"view": state}, **timing})
+
+    # a +1 click followed by the re-render it triggers
+    view.current_floor, view.current_item = None, None
+
+    async def click():
+        await rng_manager.update_drop(user_id, "Floor 7 (Necron)", "Implosion", 1)
+        await view.get_embed()
+
+    timing = await harness.time_async(click, iterations)
+    results.append({"name": "RngView.get_embed", "params": {"view": "overview_after_click"}, **timing})
+    return results
+
+
+async def bench_force_update(sizes: list, mock, shared: float) -> list:
+    from core import cache
+    from services.daily_manager import DailyManager
+
+    results = []
+    for size in sizes:
+        cache._DATA_CACHE.clear()
+        manager = DailyManager()
+        manager.set_data(make_daily_data(size, shared))
+        before = mock.requests.get("profile", 0)
+
+        start = time.perf_counter()
+        updated, errors, total = await manager.force_update_all()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        results.append({
+            "name": "DailyManager.force_update_all",
+            "params": {"users": size, "shared": shared, "upstream_latency_ms": mock.latency * 1000},
+            "samples": 1,
+            "total_ms": elapsed,
+            "per_user_ms": elapsed / size,
+            "updated": updated,
+            "errors": errors,
+            "profile_requests": mock.requests.get("profile", 0) - before
+        })
+    return results
+
+
+async def run(args) -> list:
+    from mock_upstream import MockUpstream
+
+    mock = await MockUpstream(latency_ms=args.latency_ms).start()
+    mock.patch_api()
+    try:
+        results = []
+        results += bench_simulation(args.iterations)
+        results += bench_dungeon_level(args.iterations)
+        results += bench_leaderboard(args.sizes, args.iterations)
+        results += await bench_rng_embed(args.iterations)
+        if not args.skip_force_update:
+            results += await bench_force_update(args.sizes, mock, args.shared)
+        return results
+    finally:
+        await mock.stop()
+
+
+def print_results(results: list):
+    for r in results:
+        params = ", ".join(f"{k}={v}" for k, v in r["params"].items())
+        if "mean_ms" in r:
+            print(f"{r['name']:<32} {params:<40} mean {r['mean_ms']:>9.3f}ms  p95 {r['p95_ms']:>9.3f}ms  max {r['max_ms']:>9.3f}ms")
+        else:
+            print(f"{r['name']:<32} {params:<40} total {r['total_ms']:>9.1f}ms  per user {r['per_user_ms']:.3f}ms  "
+                  f"({r['updated']} updated, {r['errors']} errors, {r['profile_requests']} profile requests)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks against a local mock of the upstream APIs")
+    parser.add_argument("--sizes", default="10,1000,10000", help="comma separated user counts")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="artificial latency added by the mock upstream")
+    parser.add_argument("--skip-force-update", action="store_true")
+    parser.add_argument("--shared", type=float, default=0.2, help="fraction of tracked users sharing a player with another user")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/bench-<timestamp>.json)")
+    args = parser.parse_args()
+    args.sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    output = Path(args.output).resolve() if args.output else DEFAULT_OUTPUT_DIR / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+
+    harness.use_scratch_dir()
+    harness.quiet_logs()
+
+    from core.serializer import BACKEND
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            "timestamp": int(time.time()),
+            "commit": harness.get_git_commit(),
+            "python": platform.python_version(),
+            "serializer": BACKEND,
+            "results": results
+        }, f, indent=4)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
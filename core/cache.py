@@ -1,4 +1,6 @@
 import time
+from core.config import CACHE_STALE_GRACE
+from core.metrics import inc, set_gauge
 
 _DATA_CACHE = {}
 
@@ -6,11 +8,28 @@ _DATA_CACHE = {}
 def cache_get(key: str):
     entry = _DATA_CACHE.get(key)
     if not entry:
+        inc("cache_requests_total", result="miss")
         return None
     expiry, data = entry
-    if time.time() > expiry:
-        del _DATA_CACHE[key]
+    now = time.time()
+    if now > expiry:
+        # expired entries hang around for a while in case the upstream is down, see cache_get_stale
+        if now > expiry + CACHE_STALE_GRACE:
+            del _DATA_CACHE[key]
+        inc("cache_requests_total", result="miss")
+        return None
+    inc("cache_requests_total", result="hit")
+    return data
+
+
+def cache_get_stale(key: str):
+    entry = _DATA_CACHE.get(key)
+    if not entry:
+        return None
+    expiry, data = entry
+    if time.time() > expiry + CACHE_STALE_GRACE:
         return None
+    inc("cache_requests_total", result="stale")
     return data
 
 
@@ -18,7 +37,7 @@ MAX_CACHE_SIZE = 10000
 
 def _cleanup_cache():
     now = time.time()
-    expired_keys = [k for k, v in _DATA_CACHE.items() if now > v[0]]
+    expired_keys = [k for k, v in _DATA_CACHE.items() if now > v[0] + CACHE_STALE_GRACE]
     for k in expired_keys:
         del _DATA_CACHE[k]
     
@@ -35,6 +54,7 @@ def cache_set(key: str, data, ttl: int = 60):
     
     expiry = time.time() + ttl
     _DATA_CACHE[key] = (expiry, data)
+    set_gauge("cache_entries", len(_DATA_CACHE))
 
 
 def get_cache_expiry(key: str):
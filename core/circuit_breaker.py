@@ -0,0 +1,98 @@
+import random
+import time
+from typing import Optional
+from core.config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BASE_COOLDOWN, CIRCUIT_MAX_COOLDOWN
+from core.logger import log_info, log_warn
+from core.metrics import inc, set_gauge
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 base_cooldown: float = CIRCUIT_BASE_COOLDOWN, max_cooldown: float = CIRCUIT_MAX_COOLDOWN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        # how many times in a row it opened without a successful probe, drives the backoff
+        self.trips = 0
+        self.open_until = 0.0
+        self.probe_started: Optional[float] = None
+        set_gauge("circuit_state", STATE_VALUES[CLOSED], upstream=name)
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        set_gauge("circuit_state", STATE_VALUES[state], upstream=self.name)
+        inc("circuit_transitions_total", upstream=self.name, state=state)
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now < self.open_until:
+                inc("circuit_rejections_total", upstream=self.name)
+                return False
+            self._set_state(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            # one probe at a time, unless the last one never reported back (cancelled request)
+            if self.probe_started is not None and now - self.probe_started < self.base_cooldown:
+                inc("circuit_rejections_total", upstream=self.name)
+                return False
+            self.probe_started = now
+        return True
+
+    def would_allow(self) -> bool:
+        # the same answer allow() would give right now, without claiming the probe or counting a rejection
+        now = time.monotonic()
+        if self.state == OPEN and now < self.open_until:
+            return False
+        if self.state != CLOSED and self.probe_started is not None and now - self.probe_started < self.base_cooldown:
+            return False
+        return True
+
+    def record_success(self):
+        self.probe_started = None
+        self.failures = 0
+        if self.state != CLOSED:
+            log_info(f"{self.name} circuit closed, upstream is back")
+            self.trips = 0
+            self._set_state(CLOSED)
+
+    def record_failure(self, retry_after: Optional[float] = None, rate_limited: bool = False):
+        self.probe_started = None
+        self.failures += 1
+        inc("circuit_failures_total", upstream=self.name)
+
+        if self.state == OPEN:
+            # requests that were already in flight when it opened, don't count them as another trip
+            if retry_after is not None:
+                self.open_until = max(self.open_until, time.monotonic() + min(retry_after, self.max_cooldown))
+            return
+
+        # a failed probe or an explicit "back off" from the server opens straight away
+        if self.state == HALF_OPEN or rate_limited or retry_after is not None or self.failures >= self.failure_threshold:
+            self._trip(retry_after)
+
+    def _trip(self, retry_after: Optional[float]):
+        self.trips += 1
+        cooldown = min(self.base_cooldown * 2 ** (self.trips - 1), self.max_cooldown)
+        # jitter so every upstream doesn't get probed in the same second
+        cooldown *= random.uniform(0.9, 1.1)
+        if retry_after is not None:
+            cooldown = min(max(cooldown, retry_after), self.max_cooldown)
+        self.open_until = time.monotonic() + cooldown
+        if self.state != OPEN:
+            log_warn(f"{self.name} circuit opened after {self.failures} failure(s), retrying in {cooldown:.0f}s")
+        self._set_state(OPEN)
+
+    def retry_in(self) -> float:
+        return max(0.0, self.open_until - time.monotonic()) if self.state == OPEN else 0.0
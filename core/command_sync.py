@@ -0,0 +1,50 @@
+import hashlib
+import json
+from discord import app_commands
+from core.logger import log_info, log_error
+from core.storage import JsonStore
+
+# application id -> hash of the last command tree synced for it, delete the file to force a sync
+COMMAND_HASH_FILE = "data/command_hash.json"
+
+store = JsonStore(COMMAND_HASH_FILE)
+synced_this_session = False
+
+
+def get_command_hash(tree: app_commands.CommandTree) -> str:
+    # the same payload tree.sync() would upload, so any change discord would see changes the hash.
+    # sorted by name so the order extensions happen to load in doesn't matter
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda c: (c.get("type", 1), c["name"]))
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def sync_commands(tree: app_commands.CommandTree) -> bool:
+    global synced_this_session
+    # commands can't change without a restart, so once a sync (or a matching hash) went through a reconnect
+    # never needs another. a failed sync leaves the flag alone and the next on_ready tries again
+    if synced_this_session:
+        return False
+
+    app_id = str(tree.client.application_id)
+    current = get_command_hash(tree)
+    try:
+        stored = await store.load() or {}
+    except Exception as e:
+        log_error(f"Failed to read command hash, syncing anyway: {e}")
+        stored = {}
+
+    if stored.get(app_id) == current:
+        synced_this_session = True
+        log_info("Command tree unchanged, skipping sync")
+        return False
+
+    synced = await tree.sync()
+    synced_this_session = True
+    log_info(f"🔁 Synced {len(synced)} global commands")
+    stored[app_id] = current
+    try:
+        await store.save(stored)
+    except Exception as e:
+        log_error(f"Failed to save command hash: {e}")
+    return True
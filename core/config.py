@@ -7,9 +7,17 @@ except ImportError:
         "secrets.py not found! Please copy secrets.example.py to secrets.py and add your Discord bot token."
     )
 
+try:
+    from core.secrets import HYPIXEL_API_KEY
+except ImportError:
+    HYPIXEL_API_KEY = None
+
 XP_PER_RUN_DEFAULT = 300000.0
 TARGET_LEVEL = 50
 DEBUG_MODE = True
+LOG_LEVEL = "DEBUG" if DEBUG_MODE else "INFO" # starting level, can be changed at runtime with /loglevel
+LOG_JSON = True # write logs/bot.log as one JSON object per line, the console stays human readable
+PRETTY_JSON = False # indent data files, only useful when reading them by hand
 SKELETON_MASTER_CHESTPLATE_50 = "SKELETON_MASTER_CHESTPLATE_50"
 
 OWNER_IDS = [
@@ -39,8 +47,30 @@ FLOOR_XP_MAP = {
     "F3": 560, "F2": 220, "F1": 110, "ENTRANCE": 55
 }
 
+METRICS_PORT = None # e.g. 9108 to serve Prometheus text on http://127.0.0.1:9108/metrics
+LOOP_LAG_INTERVAL = 0.1 # seconds between event loop pings, stalls are measured to within this
+LOOP_STALL_THRESHOLD = 0.25 # seconds the loop can be blocked before a stack sample goes to logs/profile.log
+SLOW_CALLBACK_DETECTION = False # asyncio debug mode, logs every callback slower than the stall threshold. slows every coroutine down, only turn on while chasing a stall
+
+PROFILE_BACKENDS = ["hypixel", "worker"] # tried in order, hypixel is skipped when there's no HYPIXEL_API_KEY
+PROFILE_FIXTURE_DIR = "data/fixtures" # <uuid>.json files served by the "fixture" backend
 PROFILE_CACHE_TTL = 60 # 1 minute
 PRICES_CACHE_TTL = 3600 # 1 hour
+CACHE_STALE_GRACE = 6 * 3600 # expired entries are kept this long to serve while an upstream is down
+CIRCUIT_FAILURE_THRESHOLD = 3 # consecutive failures before an upstream's circuit opens
+CIRCUIT_BASE_COOLDOWN = 15 # seconds, doubles every time a probe fails
+CIRCUIT_MAX_COOLDOWN = 600
+DAILY_UPDATE_BATCH = 25 # polled results applied (and daily_data.json saved) together
+PROGRESS_EDIT_INTERVAL = 2.0 # seconds between status message edits during long jobs, the latest state wins
+RESET_REFRESH_WINDOW = 15 * 60 # seconds before midnight utc to start refreshing everyone's xp
+RESET_REFRESH_CONCURRENCY = 4
+RESET_REFRESH_INTERVAL = 1.0 # seconds between request starts, 900 players fit in the window at one request a second
+POLL_MAX_BACKOFF = 4 # players whose xp hasn't changed in a while are polled every 2nd, then every 4th pass
+RTCA_DEFAULT_FLOOR = "M7" # /rtca without a floor, and what tracked players are precomputed for until they pick one
+PRICE_HISTORY_RETENTION = 30 * 24 * 3600 # 30 days
+PRICE_TREND_WINDOW = 7 * 24 * 3600 # 7 days
+RNG_SIM_PLAYERS = 1_000_000 # simulated players behind each /rng simulation, about 2s on one core with numpy
+RNG_SIM_DEFAULT_RUNS = 1000 # runs each simulated player does when we don't know the user's own run count
 
 GLOBAL_DROPS = [
     "Ice Spray"
@@ -172,6 +202,40 @@ CHEST_COSTS = {
     
     
     
+}
+
+# rough chance per run of each drop showing up in a chest we'd open (master mode, S+, no rng meter),
+# only used by the /rng simulation so tune them whenever better numbers come along
+DROP_CHANCES = {
+    # F7
+    "Necron's Handle": 0.0055,
+    "Implosion": 0.0028,
+    "Wither Shield": 0.0028,
+    "Shadow Warp": 0.0028,
+    "5th Master Star": 0.0085,
+    "Master Skull - Tier 5": 0.004,
+    "50% M7 Skeleton Master Chestplate": 0.0035,
+    "Thunderlord VII": 0.012,
+    "Dark Claymore": 0.0009,
+    # F6
+    "Giant's Sword": 0.006,
+    "Precursor Eye": 0.008,
+    "4th Master Star": 0.012,
+    # F5
+    "Shadow Fury": 0.012,
+    "3rd Master Star": 0.02,
+    # F4
+    "Spirit Wing": 0.03,
+    "Spirit Bone": 0.035,
+    "Spirit Shortbow": 0.015,
+    "2nd Master Star": 0.025,
+    # F3
+    "1st Master Star": 0.03,
+    # F2
+    "Scarf's Studies": 0.05,
+    # F1
+    "Bonzo's Staff": 0.04,
+    "Bonzo's Mask": 0.03,
 }
 
 def validate_config():
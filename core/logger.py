@@ -1,32 +1,111 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
-from core.config import DEBUG_MODE
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from core.config import LOG_LEVEL, LOG_JSON
 
 if not os.path.exists("logs"):
     os.makedirs("logs")
 
-logger = logging.getLogger("rtca_bot")
-logger.setLevel(logging.DEBUG if DEBUG_MODE else logging.INFO)
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+
+# fields passed as keyword args to log_* are appended as key=value
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in (getattr(record, "fields", None) or {}).items():
+            entry.setdefault(key, value)
+        return json.dumps(entry, default=str, ensure_ascii=False)
 
-formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
 
-file_handler = TimedRotatingFileHandler("logs/bot.log", when="midnight", interval=1, backupCount=7)
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+formatter = TextFormatter("[%(asctime)s] [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+file_handler = TimedRotatingFileHandler("logs/bot.log", when="midnight", interval=1, backupCount=7, encoding="utf-8")
+file_handler.setFormatter(JsonFormatter() if LOG_JSON else formatter)
 
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
 
-def log_info(msg):
-    logger.info(msg)
+profile_file_handler = RotatingFileHandler("logs/profile.log", maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+profile_file_handler.setFormatter(formatter)
+
+
+def _start_queue(target: logging.Logger, *handlers) -> QueueHandler:
+    # callers only put the record on a queue, the file and console writes happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    target.addHandler(queue_handler)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # flushes whatever is still queued on shutdown
+    atexit.register(listener.stop)
+    return queue_handler
+
+
+logger = logging.getLogger("rtca_bot")
+logger.setLevel(LOG_LEVEL)
+_start_queue(logger, file_handler, console_handler)
+
+# stall reports and slow callbacks, kept out of bot.log since the stacks are long
+profile_logger = logging.getLogger("rtca_bot.profile")
+profile_logger.setLevel(logging.INFO)
+profile_logger.propagate = False
+profile_handler = _start_queue(profile_logger, profile_file_handler)
+
+_sample_counts = {}
+
+
+def set_log_level(level: str) -> str:
+    level = level.upper()
+    if level not in LEVELS:
+        raise ValueError(f"Unknown log level: {level}")
+    logger.setLevel(level)
+    return level
+
+def get_log_level() -> str:
+    return logging.getLevelName(logger.level)
+
+def debug_enabled() -> bool:
+    return logger.isEnabledFor(logging.DEBUG)
+
+# msg can use %s placeholders with args, they're only formatted if the level is enabled
+def log_info(msg, *args, **fields):
+    logger.info(msg, *args, extra={"fields": fields} if fields else None)
+
+# sample=N only lets every Nth call with the same msg through, for lines inside loops
+def log_debug(msg, *args, sample: int = 1, **fields):
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if sample > 1:
+        seen = _sample_counts.get(msg, 0)
+        _sample_counts[msg] = seen + 1
+        if seen % sample:
+            return
+        fields["sampled"] = f"1/{sample}"
+    logger.debug(msg, *args, extra={"fields": fields} if fields else None)
 
-def log_debug(msg):
-    logger.debug(msg)
+def log_warn(msg, *args, **fields):
+    logger.warning(msg, *args, extra={"fields": fields} if fields else None)
 
-def log_warn(msg):
-    logger.warning(msg)
+def log_error(msg, *args, **fields):
+    logger.error(msg, *args, extra={"fields": fields} if fields else None)
 
-def log_error(msg):
-    logger.error(msg)
+def log_profile(msg, *args):
+    profile_logger.info(msg, *args)
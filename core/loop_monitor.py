@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Optional
+from core.config import LOOP_LAG_INTERVAL, LOOP_STALL_THRESHOLD, SLOW_CALLBACK_DETECTION
+from core.logger import log_info, log_warn, log_profile, profile_handler
+from core.metrics import inc, observe
+
+STACK_SAMPLE_INTERVAL = 0.02 # how often the loop thread's stack is sampled while it's stuck
+STACK_DEPTH = 30
+TOP_STACKS = 3
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_STALL_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.loop = None
+        self.loop_thread_id = None
+        self.thread = None
+        self.answered = threading.Event()
+        self.stopping = threading.Event()
+        self.stalls = 0
+        self.last_stall = None
+
+    def start(self):
+        if self.thread:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+
+        if SLOW_CALLBACK_DETECTION:
+            # debug mode makes asyncio log every callback/task step that runs longer than this
+            self.loop.set_debug(True)
+            self.loop.slow_callback_duration = self.threshold
+            logging.getLogger("asyncio").addHandler(profile_handler)
+
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True)
+        self.thread.start()
+        log_info(f"Loop monitor started (stall threshold {self.threshold * 1000:.0f}ms, slow callback detection {'on' if SLOW_CALLBACK_DETECTION else 'off'})")
+
+    def stop(self):
+        if not self.thread:
+            return
+        self.stopping.set()
+        self.answered.set()
+        self.thread.join(timeout=1)
+        self.thread = None
+
+    def _pong(self, sent: float):
+        observe("loop_lag_ms", (time.monotonic() - sent) * 1000)
+        self.answered.set()
+
+    def _watchdog(self):
+        # runs in its own thread so it can still look at the loop while the loop is blocked
+        while not self.stopping.is_set():
+            self.answered.clear()
+            sent = time.monotonic()
+            try:
+                self.loop.call_soon_threadsafe(self._pong, sent)
+            except RuntimeError:
+                # loop closed
+                return
+
+            if not self.answered.wait(self.threshold):
+                started = time.time()
+                task_name = self._current_task_name()
+                samples = Counter()
+                while not self.answered.wait(STACK_SAMPLE_INTERVAL):
+                    stack = self._sample_stack()
+                    if stack:
+                        samples[stack] += 1
+                    if self.stopping.is_set():
+                        return
+                if self.stopping.is_set():
+                    return
+                self._report(time.monotonic() - sent, started, task_name, samples)
+
+            self.stopping.wait(self.interval)
+
+    def _sample_stack(self) -> Optional[str]:
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return None
+        return "".join(traceback.format_list(traceback.extract_stack(frame, limit=STACK_DEPTH)))
+
+    def _current_task_name(self) -> str:
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            return "?"
+        if task is None:
+            return "(no task, plain callback)"
+        coro = task.get_coro()
+        return f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+
+    def _report(self, duration: float, started: float, task_name: str, samples: Counter):
+        duration_ms = duration * 1000
+        total = sum(samples.values())
+        lines = [f"Event loop blocked for at least {duration_ms:.0f}ms at {time.strftime('%H:%M:%S', time.localtime(started))} in task {task_name}, {total} stack samples"]
+        for stack, count in samples.most_common(TOP_STACKS):
+            lines.append(f"--- {count / total * 100:.0f}% ({count} samples) ---")
+            lines.append(stack.rstrip())
+        log_profile("\n".join(lines))
+        log_warn(f"Event loop blocked for at least {duration_ms:.0f}ms in {task_name}, stack written to logs/profile.log")
+
+        # metrics are only touched from the loop thread
+        try:
+            self.loop.call_soon_threadsafe(self._record_stall, duration_ms, task_name)
+        except RuntimeError:
+            pass
+
+    def _record_stall(self, duration_ms: float, task_name: str):
+        self.stalls += 1
+        self.last_stall = (time.time(), duration_ms, task_name)
+        inc("loop_stalls_total")
+        observe("loop_stall_ms", duration_ms)
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import time
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+START_TIME = time.time()
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        # last slot is +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        # upper bound of the bucket holding the q-th sample, good enough for a dashboard
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(float(self.bounds[i]), self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+_counters: Dict[MetricKey, float] = {}
+_gauges: Dict[MetricKey, float] = {}
+_histograms: Dict[MetricKey, Histogram] = {}
+
+
+def _key(name: str, labels: dict) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    key = _key(name, labels)
+    _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels):
+    key = _key(name, labels)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = Histogram()
+    histogram.observe(value)
+
+
+def timed(name: str, **labels):
+    def decorator(func):
+        func_labels = {"func": func.__name__, **labels}
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    inc(f"{name}_errors_total", **func_labels)
+                    raise
+                finally:
+                    observe(f"{name}_ms", (time.perf_counter() - start) * 1000, **func_labels)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                inc(f"{name}_errors_total", **func_labels)
+                raise
+            finally:
+                observe(f"{name}_ms", (time.perf_counter() - start) * 1000, **func_labels)
+        return wrapper
+    return decorator
+
+
+def get_counter(name: str, **labels) -> float:
+    return _counters.get(_key(name, labels), 0)
+
+
+def get_gauge(name: str, **labels) -> float:
+    return _gauges.get(_key(name, labels), 0)
+
+
+def get_histograms(name: str) -> Dict[Tuple[Tuple[str, str], ...], Histogram]:
+    return {labels: h for (metric, labels), h in _histograms.items() if metric == name}
+
+
+def get_counters(name: str) -> Dict[Tuple[Tuple[str, str], ...], float]:
+    return {labels: v for (metric, labels), v in _counters.items() if metric == name}
+
+
+def get_gauges(name: str) -> Dict[Tuple[Tuple[str, str], ...], float]:
+    return {labels: v for (metric, labels), v in _gauges.items() if metric == name}
+
+
+def get_cache_hit_rate() -> float:
+    hits = get_counter("cache_requests_total", result="hit")
+    misses = get_counter("cache_requests_total", result="miss")
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def reset():
+    _counters.clear()
+    _gauges.clear()
+    _histograms.clear()
+
+
+def _format_labels(labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render_prometheus() -> str:
+    lines = []
+    seen_types = set()
+
+    def type_line(name: str, kind: str):
+        if name not in seen_types:
+            seen_types.add(name)
+            lines.append(f"# TYPE rtca_{name} {kind}")
+
+    for (name, labels), value in sorted(_counters.items()):
+        type_line(name, "counter")
+        lines.append(f"rtca_{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), value in sorted(_gauges.items()):
+        type_line(name, "gauge")
+        lines.append(f"rtca_{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), histogram in sorted(_histograms.items(), key=lambda item: item[0]):
+        type_line(name, "histogram")
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+            cumulative += bucket_count
+            bucket_labels = _format_labels(labels, 'le="%s"' % bound)
+            lines.append(f"rtca_{name}_bucket{bucket_labels} {cumulative}")
+        inf_labels = _format_labels(labels, 'le="+Inf"')
+        lines.append(f"rtca_{name}_bucket{inf_labels} {histogram.count}")
+        lines.append(f"rtca_{name}_sum{_format_labels(labels)} {histogram.total}")
+        lines.append(f"rtca_{name}_count{_format_labels(labels)} {histogram.count}")
+
+    lines.append("# TYPE rtca_uptime_seconds gauge")
+    lines.append(f"rtca_uptime_seconds {time.time() - START_TIME:.0f}")
+    return "\n".join(lines) + "\n"
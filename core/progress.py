@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import Optional
+from core.config import PROGRESS_EDIT_INTERVAL
+from core.logger import log_debug
+from core.metrics import inc
+
+
+class ProgressReporter:
+    def __init__(self, message, interval: float = PROGRESS_EDIT_INTERVAL):
+        self.message = message
+        self.interval = interval
+        self.latest: Optional[str] = None
+        self.sent: Optional[str] = None
+        # the message was just sent, that counts as the first edit
+        self.last_edit = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+        self.editing = False
+        self.closed = False
+
+    def update(self, content: str):
+        # only the newest content matters, anything that was waiting gets replaced
+        if self.closed:
+            return
+        self.latest = content
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        else:
+            inc("progress_updates_coalesced_total")
+
+    async def _run(self):
+        # the only place that edits before finish(), so there's never more than one edit in flight
+        while not self.closed and self.latest != self.sent:
+            wait = self.interval - (time.monotonic() - self.last_edit)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._edit(self.latest)
+
+    async def _edit(self, content: str):
+        self.editing = True
+        try:
+            await self.message.edit(content=content)
+            inc("progress_edits_total", result="ok")
+        except Exception as e:
+            # a missed progress edit isn't worth failing the job over, the next one replaces it anyway
+            inc("progress_edits_total", result="failed")
+            log_debug("Progress edit failed: %s", e)
+        finally:
+            self.sent = content
+            self.last_edit = time.monotonic()
+            self.editing = False
+
+    async def finish(self, content: Optional[str] = None):
+        self.closed = True
+        if content is not None:
+            self.latest = content
+        if self.task and not self.task.done():
+            if self.editing:
+                await asyncio.gather(self.task, return_exceptions=True)
+            else:
+                # just waiting out the interval, the final edit goes now instead
+                self.task.cancel()
+                await asyncio.gather(self.task, return_exceptions=True)
+        if self.latest is not None and self.latest != self.sent:
+            await self._edit(self.latest)
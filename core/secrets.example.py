@@ -7,3 +7,6 @@ Copy this file to secrets.py and fill in your actual token
 # Get your token from: https://discord.com/developers/applications
 TOKEN = "your_discord_bot_token_here"
 
+# Optional Hypixel API key, profiles are fetched from the official API when set
+# Get one from: https://developer.hypixel.net/
+# HYPIXEL_API_KEY = "your_hypixel_api_key_here"
@@ -0,0 +1,64 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _json_dumps(obj, pretty: bool = False) -> bytes:
+    if pretty:
+        # orjson can only indent by 2, every backend does the same so the files don't churn when it changes
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _json_loads(data):
+    return json.loads(data)
+
+
+def _orjson_dumps(obj, pretty: bool = False) -> bytes:
+    option = orjson.OPT_NON_STR_KEYS
+    if pretty:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, option=option)
+
+
+def _msgspec_dumps(obj, pretty: bool = False) -> bytes:
+    data = msgspec.json.encode(obj)
+    if pretty:
+        return msgspec.json.format(data, indent=2)
+    return data
+
+
+def _msgspec_loads(data):
+    # callers only catch ValueError, which json and orjson already raise but msgspec doesn't
+    try:
+        return msgspec.json.decode(data)
+    except msgspec.DecodeError as e:
+        raise ValueError(str(e)) from e
+
+
+# name -> (dumps, loads), fastest first
+BACKENDS = {}
+if orjson is not None:
+    BACKENDS["orjson"] = (_orjson_dumps, orjson.loads)
+if msgspec is not None:
+    BACKENDS["msgspec"] = (_msgspec_dumps, _msgspec_loads)
+BACKENDS["json"] = (_json_dumps, _json_loads)
+
+BACKEND = next(iter(BACKENDS))
+_dumps, _loads = BACKENDS[BACKEND]
+
+
+def dumps(obj, pretty: bool = False) -> bytes:
+    return _dumps(obj, pretty)
+
+
+def loads(data):
+    return _loads(data)
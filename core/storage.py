@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+from core.config import PRETTY_JSON
+from core.logger import log_debug
+from core.metrics import inc, observe, set_gauge
+from core.serializer import dumps, loads
+
+
+class JsonStore:
+    def __init__(self, path: str, pretty: bool = PRETTY_JSON):
+        self.path = path
+        self.pretty = pretty
+        # serializes every write to this file (and anything that has to happen together with it)
+        self.lock = asyncio.Lock()
+        self.saves = 0
+        self.save_time_ms = 0.0
+        self.last_save_ms = 0.0
+        self.last_save_bytes = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    async def load(self):
+        if not self.exists():
+            return None
+        start = time.perf_counter()
+        data = await asyncio.to_thread(self._read)
+        log_debug("Loaded %s in %.2fms", self.path, (time.perf_counter() - start) * 1000)
+        return data
+
+    async def save(self, data):
+        async with self.lock:
+            await self.save_locked(data)
+
+    async def save_locked(self, data):
+        # data is serialized on a worker thread, callers must pass a snapshot they won't mutate
+        start = time.perf_counter()
+        size = await asyncio.to_thread(self._write, data)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.saves += 1
+        self.save_time_ms += elapsed
+        self.last_save_ms = elapsed
+        self.last_save_bytes = size
+        file_name = os.path.basename(self.path)
+        observe("file_save_ms", elapsed, file=file_name)
+        inc("file_save_bytes_total", size, file=file_name)
+        set_gauge("file_size_bytes", size, file=file_name)
+        log_debug("Saved %s (%d bytes) in %.2fms", self.path, size, elapsed)
+
+    def get_stats(self) -> dict:
+        return {
+            "saves": self.saves,
+            "avg_save_ms": self.save_time_ms / self.saves if self.saves else 0.0,
+            "last_save_ms": self.last_save_ms,
+            "last_save_bytes": self.last_save_bytes
+        }
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return loads(f.read())
+
+    def _write(self, data) -> int:
+        content = dumps(data, pretty=self.pretty)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return len(content)
@@ -1,57 +1,150 @@
+import time
+STARTUP_START = time.perf_counter() # imports are part of the cold start too
+
+import discord
 from discord.ext import commands, tasks
-from core.config import TOKEN, INTENTS, validate_config
+from core.config import TOKEN, INTENTS, DAILY_UPDATE_BATCH, validate_config
 from core.logger import log_info, log_error
-from services.daily_manager import daily_manager
-from services.api import get_dungeon_xp
+from core.metrics import inc, observe, set_gauge
+from core.loop_monitor import loop_monitor
+from core.command_sync import sync_commands
+from services.daily_manager import daily_manager, log_poll_pass
+from services.link_manager import link_manager
+from services.rng_manager import rng_manager
+from services.reset_scheduler import reset_scheduler
+from services.rtca_precompute import rtca_precompute
+from services.api import get_dungeon_xp, warm_start_prices
 import asyncio
 import os
 
 bot = commands.Bot(command_prefix="!", intents=INTENTS)
+data_loading = None
+sanitize_task = None
+startup_complete = False
+DATA_LOAD_WAIT = 2.5 # seconds an early interaction waits for the data files, discord wants a response within 3
+
+async def wait_for_data(interaction: discord.Interaction) -> bool:
+    # data loads while we log in, a command or button handled before it finishes would save
+    # near-empty data over the real files
+    if data_loading is None or data_loading.done():
+        return True
+    try:
+        await asyncio.wait_for(asyncio.shield(data_loading), timeout=DATA_LOAD_WAIT)
+    except asyncio.TimeoutError:
+        inc("interactions_rejected_total", reason="loading")
+        await interaction.response.send_message("⏳ Still starting up, try again in a few seconds.", ephemeral=True)
+        return False
+    except Exception:
+        # on_ready logs it, whatever did load is as good as it gets
+        pass
+    return True
+
+# every view is created by a command, so gating the commands covers the buttons and selects too
+bot.tree.interaction_check = wait_for_data
 
 @tasks.loop(hours=2)
 async def track_daily_stats():
     log_info("Running scheduled daily stats update...")
     
+    # only catches up if the reset scheduler missed a boundary, it normally resets at midnight itself
     await daily_manager.check_resets()
     
-    users = daily_manager.get_tracked_users()
-    if not users:
+    uuids = daily_manager.start_poll_pass()
+    tracked = len(daily_manager.subscribers)
+    if not uuids:
+        log_info(f"No players due this pass ({tracked} tracked, all backed off).")
         return
 
-    log_info(f"Updating stats for {len(users)} tracked users.")
+    log_info(f"Updating stats for {len(uuids)}/{tracked} players ({daily_manager.get_subscriber_count()} tracked users), the rest haven't changed recently.")
     
-    for user_id, uuid in users:
+    pending = []
+    polled = 0
+    changed = 0
+    for i, uuid in enumerate(uuids):
+        set_gauge("scheduler_queue_depth", len(uuids) - i, job="daily_stats")
         try:
             xp_data = await get_dungeon_xp(uuid)
             if xp_data:
-                await daily_manager.update_user_data(user_id, xp_data)
+                pending.append((uuid, xp_data, int(time.time())))
+                polled += 1
         except Exception as e:
             log_error(f"Error updating user {uuid}: {e}")
         
+        # saved in batches, a pass over every player takes a while and shouldn't all be lost to a restart
+        if len(pending) >= DAILY_UPDATE_BATCH:
+            changed += await daily_manager.apply_updates(pending, scheduled=True)
+            pending = []
+        
         await asyncio.sleep(10)
+    
+    if pending:
+        changed += await daily_manager.apply_updates(pending, scheduled=True)
         
-    log_info("Daily stats update completed.")
+    set_gauge("scheduler_queue_depth", 0, job="daily_stats")
+    log_poll_pass("Daily stats update completed", polled, changed)
+
+async def load_data():
+    # none of these depend on each other, and they all read their files on worker threads
+    start = time.perf_counter()
+    await asyncio.gather(
+        daily_manager.initialize(),
+        link_manager.initialize(),
+        rng_manager.initialize(),
+        rtca_precompute.initialize(),
+        warm_start_prices()
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    set_gauge("startup_ms", elapsed, phase="data_load")
+    log_info(f"Loaded data files in {elapsed:.0f}ms")
 
 @bot.listen()
 async def on_ready():
-    await daily_manager.initialize()
-    await daily_manager.sanitize_data()
-    if not track_daily_stats.is_running():
-        track_daily_stats.start()
+    global startup_complete, sanitize_task
+    if not startup_complete:
+        # started before login, usually finished long before the gateway is ready
+        try:
+            await data_loading
+        except Exception as e:
+            log_error(f"Failed to load data: {e}")
+        startup_complete = True
+        
+        # fixing broken uuids can mean a lot of playerdb calls, nothing has to wait for it
+        sanitize_task = asyncio.create_task(daily_manager.sanitize_data())
+        # resets at midnight utc on the dot, rather than whenever the 2 hour loop happens to run
+        reset_scheduler.start()
+        
+        ready_ms = (time.perf_counter() - STARTUP_START) * 1000
+        set_gauge("startup_ms", ready_ms, phase="ready")
+        log_info(f"✅ Logged in as {bot.user} (ready in {ready_ms / 1000:.2f}s)")
+    else:
+        log_info(f"✅ Reconnected as {bot.user}")
     
-    log_info(f"✅ Logged in as {bot.user}")
+    # a no-op once a sync went through, so this only does anything again if the last attempt failed
     try:
-        synced = await bot.tree.sync()
-        log_info(f"🔁 Synced {len(synced)} global commands")
+        await sync_commands(bot.tree)
     except Exception as e:
         log_error(f"❌ Sync failed: {e}")
+    
+    if not track_daily_stats.is_running():
+        track_daily_stats.start()
+
+@bot.listen()
+async def on_interaction(interaction: discord.Interaction):
+    inc("interactions_total", type=interaction.type.name)
+
+@bot.listen()
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    latency = (discord.utils.utcnow() - interaction.created_at).total_seconds() * 1000
+    observe("interaction_latency_ms", latency, command=command.qualified_name)
 
 async def load_extensions():
+    start = time.perf_counter()
     extensions = [
         "modules.dungeons",
         "modules.rng",
         "modules.leaderboard",
         "modules.settings",
+        "modules.perf",
         "modules.error_handler"
     ]
     for ext in extensions:
@@ -60,11 +153,16 @@ async def load_extensions():
             log_info(f"Loaded extension: {ext}")
         except Exception as e:
             log_error(f"Failed to load extension {ext}: {e}")
+    set_gauge("startup_ms", (time.perf_counter() - start) * 1000, phase="extensions")
 
 async def main():
+    global data_loading
     validate_config()
     log_info("Starting RTCA Discord Bot...")
     
+    loop_monitor.start()
+    data_loading = asyncio.create_task(load_data())
+    
     await load_extensions()
     
     try:
@@ -3,41 +3,14 @@ from discord import app_commands
 from discord.ext import commands
 from discord.ui import Select, View
 import time
-import math
-from core.config import TARGET_LEVEL, FLOOR_XP_MAP, XP_PER_RUN_DEFAULT, OWNER_IDS
+from datetime import datetime, timezone
+from core.config import TARGET_LEVEL, FLOOR_XP_MAP, XP_PER_RUN_DEFAULT, OWNER_IDS, RTCA_DEFAULT_FLOOR
 from core.logger import log_info, log_debug, log_error
-from services.api import get_uuid, get_profile_data
-from services.simulation_logic import simulate_to_level_all50
+from services.api import get_uuid, get_dungeon_profile
+from services.simulation_logic import simulate_to_level_all50, estimate_all_floors, project_runs, runs_until, default_bonuses, build_bonuses, calculate_dungeon_xp_per_run
 from services.daily_manager import daily_manager
 from services.link_manager import link_manager
-
-default_bonuses = {
-    "ring": 0.1,
-    "hecatomb": 0.02,
-    "scarf_accessory": 0.06,
-    "scarf_attribute": 0.2,
-    "global": 1.0,
-    "mayor": 1.0
-}
-
-def calculate_dungeon_xp_per_run(base_floor: float, ring: float, hecatomb: float, global_mult: float, mayor_mult: float) -> float:
-    if base_floor >= 15000:
-        maxcomps = 26
-    elif base_floor == 4880:
-        maxcomps = 51
-    else:
-        maxcomps = 76
-    
-    if ring > 0 and mayor_mult > 1:
-        cataperrun = base_floor * (0.95 + ((mayor_mult - 1) + (maxcomps - 1) / 100) + ring + hecatomb + (maxcomps - 1) * (0.024 + hecatomb / 50))
-    elif ring > 0:
-        cataperrun = base_floor * (0.95 + ring + hecatomb + (maxcomps - 1) * (0.024 + hecatomb / 50))
-    else:
-        cataperrun = base_floor * (0.95 + hecatomb + (maxcomps - 1) * (0.022 + hecatomb / 50))
-    
-    cataperrun *= global_mult
-    return math.ceil(cataperrun)
-
+from services.rtca_precompute import rtca_precompute, make_entry
 
 class ValueSelect(Select):
     
@@ -66,7 +39,7 @@ class ValueSelect(Select):
         
         self.parent_view.bonuses[self.option] = value
         
-        log_debug(f"Recalculating with bonuses: {self.parent_view.bonuses}")
+        log_debug("Recalculating with bonuses: %s", self.parent_view.bonuses)
         
         ring = self.parent_view.bonuses.get("ring", default_bonuses["ring"])
         hecatomb = self.parent_view.bonuses.get("hecatomb", default_bonuses["hecatomb"])
@@ -76,15 +49,15 @@ class ValueSelect(Select):
         dungeon_xp = calculate_dungeon_xp_per_run(self.parent_view.base_floor, ring, hecatomb, global_mult, mayor_mult)
         
         self.parent_view.xp_per_run = dungeon_xp
-        log_debug(f"Dungeon XP per run: {dungeon_xp:,.0f}")
+        log_debug("Dungeon XP per run: %.0f", dungeon_xp)
         
-        runs_total, results = simulate_to_level_all50(
+        runs_total, results, milestones = simulate_to_level_all50(
             self.parent_view.dungeon_classes, 
             self.parent_view.base_floor, 
             self.parent_view.bonuses
         )
         
-        embed = self.parent_view._create_embed(results, runs_total)
+        embed = self.parent_view._create_embed(results, runs_total, milestones)
         
         self.parent_view._reset_view()
         
@@ -203,8 +176,10 @@ def _create_option_list(option: str, current_val: float) -> list[discord.SelectO
 class BonusSelectView(View):
     
     def __init__(self, bot: commands.Bot, dungeon_classes: dict, base_floor: float, 
-                 initial_bonuses: dict, ign: str, floor: str, xp_per_run: float):
+                 initial_bonuses: dict, ign: str, floor: str, xp_per_run: float, compare: bool = False, budget: int = None):
         super().__init__(timeout=300)
+        self.compare = compare
+        self.budget = budget
         self.bot = bot
         self.dungeon_classes = dungeon_classes
         self.base_floor = base_floor
@@ -230,8 +205,10 @@ class BonusSelectView(View):
         self.main_select = MainSelect(self)
         self.add_item(self.main_select)
     
-    def _create_embed(self, results: dict, runs_total: int) -> discord.Embed:
+    def _create_embed(self, results: dict, runs_total: int, milestones: dict = None, as_of: int = None) -> discord.Embed:
         xp_description = f"Dungeon XP per run: {self.xp_per_run:,.0f}"
+        if as_of:
+            xp_description += f"\nXP as of <t:{as_of}:R>"
         
         embed = discord.Embed(
             title=f"Simulation — reach Level {TARGET_LEVEL} for all classes ({self.ign})",
@@ -247,14 +224,87 @@ class BonusSelectView(View):
             rem_text = "\n(✅ reached)" if runs_for_class == 0 and lvl >= TARGET_LEVEL else "\n(❌ not yet)"
             embed.add_field(
                 name=cls.title(),
-                value=f"Expected Level {lvl:.2f} {rem_text}\n({runs_for_class} runs)",
+                value=f"Expected Level {lvl:.2f} {rem_text}\n({runs_for_class} runs){_format_next_level(milestones, cls)}",
                 inline=True
             )
         
+        milestone_text = _format_milestones(milestones)
+        if milestone_text:
+            embed.add_field(name="Class Average Milestones", value=milestone_text, inline=False)
+        
+        if self.compare:
+            # cheap enough to redo on every bonus change, it's one solve for all floors
+            estimates = estimate_all_floors(self.dungeon_classes, self.bonuses, FLOOR_XP_MAP)
+            embed.add_field(name="All Floors (estimated runs)", value=_format_floor_comparison(estimates, self.floor.upper()), inline=False)
+        
+        if self.budget is not None:
+            projection = project_runs(self.dungeon_classes, self.base_floor, self.bonuses, self.budget)
+            embed.add_field(name=f"After {self.budget:,} runs", value=_format_projection(projection), inline=False)
+        
         embed.set_footer(text=f"Total simulated runs: {runs_total:,} \nDM @BLACKUM if you want to report an issue.")
         return embed
 
 
+def _format_next_level(milestones: dict, cls: str) -> str:
+    crossed = milestones["classes"].get(cls) if milestones else None
+    if not crossed:
+        return ""
+    level = min(crossed)
+    return f"\nLvl {level} after {crossed[level]:,} runs"
+
+
+def _format_milestones(milestones: dict) -> str:
+    if not milestones or not milestones["average"]:
+        return ""
+    # every 5th level plus the last few, a fresh profile would otherwise list 50 lines
+    lines = [
+        f"CA {level}: {runs:,} runs"
+        for level, runs in milestones["average"].items()
+        if level % 5 == 0 or level > TARGET_LEVEL - 5
+    ]
+    return "\n".join(lines)
+
+
+def _format_projection(projection: dict) -> str:
+    lines = [
+        f"{cls.title():<8} {info['level']:>6.2f} ({info['runs_done']:,} runs)"
+        for cls, info in projection["classes"].items()
+    ]
+    lines.append(f"{'Average':<8} {projection['average']:>6.2f}")
+    text = "```\n" + "\n".join(lines) + "\n```"
+    if projection["finished"]:
+        text += f"\nAll classes reach {TARGET_LEVEL} after {projection['runs']:,} runs"
+    return text
+
+
+def _parse_budget(runs: int, until: str, per_day: int):
+    # returns (budget, error), a plain run count wins over a date
+    if runs is not None:
+        if runs <= 0:
+            return None, "❌ `runs` must be a positive number."
+        return runs, None
+    if until is None and per_day is None:
+        return None, None
+    if until is None or per_day is None or per_day <= 0:
+        return None, "❌ `until` needs a positive `per_day` alongside it (and the other way around)."
+    try:
+        target = datetime.strptime(until, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None, "❌ `until` must be a date like 2026-12-31."
+    budget = runs_until(target.timestamp(), per_day)
+    if budget <= 0:
+        return None, "❌ `until` must be in the future."
+    return budget, None
+
+
+def _format_floor_comparison(estimates: dict, current_floor: str) -> str:
+    lines = []
+    for floor, info in sorted(estimates.items(), key=lambda item: item[1]["runs"]):
+        marker = " ◀" if floor == current_floor else ""
+        lines.append(f"{floor:<8} {info['runs']:>11,}{marker}")
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
 class DefaultValueSelect(Select):
     
     def __init__(self, parent_view: 'DefaultSelectView', option: str, options: list):
@@ -418,21 +468,42 @@ class Dungeons(commands.Cog):
 
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
-    @app_commands.describe(ign="Minecraft IGN (optional if linked)", floor="Dungeon floor (M7, M6, etc.)")
+    @app_commands.describe(ign="Minecraft IGN (optional if linked)", floor="Dungeon floor (M7, M6, etc.)",
+                           compare="Also estimate runs to 50 on every floor",
+                           runs="Show where you'd be after this many runs",
+                           until="Show where you'd be on this date (YYYY-MM-DD), needs per_day",
+                           per_day="Runs per day until that date")
     @app_commands.command(name="rtca", description="Simulate runs until all dungeon classes reach level 50")
-    async def rtca(self, interaction: discord.Interaction, ign: str = None, floor: str = "M7"):
+    async def rtca(self, interaction: discord.Interaction, ign: str = None, floor: str = RTCA_DEFAULT_FLOOR, compare: bool = False,
+                   runs: int = None, until: str = None, per_day: int = None):
         start_time = time.perf_counter()
         await interaction.response.defer(thinking=True)
-        log_debug(f"Defer sent after {(time.perf_counter() - start_time):.2f}s")
+        log_debug("Defer sent after %.2fs", time.perf_counter() - start_time)
         
         log_info(f"Command /rtca called by {interaction.user} → {ign if ign else '[Linked]'}")
         
+        budget, error = _parse_budget(runs, until, per_day)
+        if error:
+            await interaction.followup.send(error, ephemeral=True)
+            return
+        
         if ign is None:
             ign = link_manager.get_link(interaction.user.id)
             if not ign:
                 await interaction.followup.send("❌ You must provide an IGN or link your account first using `/link <ign>`.", ephemeral=True)
                 return
             
+            await rtca_precompute.remember_floor(interaction.user.id, floor.upper())
+            # tracked players are re-simulated in the background whenever polling sees their xp move
+            tracked_uuid = daily_manager.get_user_uuid(interaction.user.id)
+            entry = rtca_precompute.get(tracked_uuid, floor.upper()) if tracked_uuid else None
+            if entry:
+                view = BonusSelectView(self.bot, entry["class_xp"], entry["base_floor"], entry["bonuses"], ign, floor, entry["xp_per_run"], compare, budget)
+                embed = view._create_embed(entry["results"], entry["runs_total"], entry["milestones"], as_of=entry["polled_at"])
+                view.message = await interaction.followup.send(embed=embed, view=view)
+                log_info(f"✅ Precomputed simulation sent: {ign} → {entry['runs_total']:,} total runs")
+                return
+            
             try:
                 uuid_check = await get_uuid(ign)
                 if uuid_check:
@@ -447,60 +518,21 @@ class Dungeons(commands.Cog):
             await interaction.followup.send("❌ Could not find that username.")
             return
         
-        profile_data = await get_profile_data(uuid)
-        if not profile_data:
+        profile = await get_dungeon_profile(uuid)
+        if not profile:
             await interaction.followup.send("❌ Failed to fetch SkyBlock data.")
             return
         
-        profiles = profile_data.get("profiles")
-        if not profiles:
-            await interaction.followup.send("❌ No SkyBlock profile found.")
-            return
-        
-        best_profile = next((p for p in profiles if p.get("selected")), profiles[0])
-        member = best_profile["members"][uuid]
-        dungeons = member.get("dungeons", {})
-        player_classes = dungeons.get("player_classes", {})
-        
-        dungeon_classes = {
-            cls: data["experience"]
-            for cls, data in player_classes.items()
-            if cls in ["archer", "berserk", "healer", "mage", "tank"]
-        }
+        dungeon_classes = dict(profile.class_xp)
         
         if not dungeon_classes:
             await interaction.followup.send("❌ This player has no dungeon data.")
             return
         
-        player_data = member.get("player_data", {})
-        perks = player_data.get("perks", {})
-        class_boosts = {
-            "archer": perks.get("toxophilite", 0) * 0.02,
-            "berserk": perks.get("unbridled_rage", 0) * 0.02,
-            "healer": perks.get("heart_of_gold", 0) * 0.02,
-            "mage": perks.get("cold_efficiency", 0) * 0.02,
-            "tank": perks.get("diamond_in_the_rough", 0) * 0.02,
-        }
-        
-        ring_bonus = default_bonuses["ring"]
-        hecatomb_value = default_bonuses["hecatomb"]
-        scarf_accessory_value = default_bonuses["scarf_accessory"]
-        scarf_attribute_value = default_bonuses["scarf_attribute"]
-        
-        global_mult = default_bonuses["global"]
-        mayor_mult = default_bonuses["mayor"]
-        
-        bonuses = {
-            "ring": ring_bonus,
-            "hecatomb": hecatomb_value,
-            "scarf_accessory": scarf_accessory_value,
-            "scarf_attribute": scarf_attribute_value,
-            "global": global_mult,
-            "mayor": mayor_mult,
-            "class_boosts": class_boosts
-        }
-        
-        log_debug(f"Detected bonuses: {bonuses}")
+        class_boosts = dict(profile.class_boosts)
+        bonuses = build_bonuses(class_boosts)
+        
+        log_debug("Detected bonuses: %s", bonuses)
         
         ring = bonuses.get("ring", default_bonuses["ring"])
         hecatomb = bonuses.get("hecatomb", default_bonuses["hecatomb"])
@@ -509,13 +541,15 @@ class Dungeons(commands.Cog):
         
         dungeon_xp = calculate_dungeon_xp_per_run(base_floor, ring, hecatomb, global_mult, mayor_mult)
         
-        log_debug(f"Dungeon XP per run: {dungeon_xp:,.0f}")
+        log_debug("Dungeon XP per run: %.0f", dungeon_xp)
         
-        runs_total, results = simulate_to_level_all50(dungeon_classes, base_floor, bonuses)
+        runs_total, results, milestones = simulate_to_level_all50(dungeon_classes, base_floor, bonuses)
+        if uuid in daily_manager.subscribers:
+            rtca_precompute.put(uuid, floor.upper(), make_entry(dungeon_classes, bonuses, base_floor, dungeon_xp, runs_total, results, milestones, int(time.time())))
         
-        view = BonusSelectView(self.bot, dungeon_classes, base_floor, bonuses, ign, floor, dungeon_xp)
+        view = BonusSelectView(self.bot, dungeon_classes, base_floor, bonuses, ign, floor, dungeon_xp, compare, budget)
         
-        embed = view._create_embed(results, runs_total)
+        embed = view._create_embed(results, runs_total, milestones)
         
         message = await interaction.followup.send(embed=embed, view=view)
         view.message = message
@@ -7,6 +7,7 @@ import math
 from datetime import datetime, timedelta, timezone
 from core.config import OWNER_IDS
 from core.logger import log_info, log_error
+from core.progress import ProgressReporter
 from services.api import get_uuid, get_dungeon_xp
 from services.daily_manager import daily_manager
 from services.link_manager import link_manager
@@ -255,16 +256,21 @@ class DailyView(View):
         await interaction.response.defer(ephemeral=False)
         
         try:
-            tracked_users = daily_manager.get_tracked_users()
-            if not tracked_users:
+            tracked_uuids = daily_manager.get_tracked_uuids()
+            if not tracked_uuids:
                 await interaction.followup.send("❌ No users to update.", ephemeral=True)
                 return
 
-            status_msg = await interaction.followup.send(f"🔄 **Force Update Started**\nQueue: {len(tracked_users)} users...")
+            status_msg = await interaction.followup.send(f"🔄 **Force Update Started**\nQueue: {len(tracked_uuids)} players...")
             
-            updated_count, errors, total_users = await daily_manager.force_update_all(status_msg)
+            progress = ProgressReporter(status_msg)
+            try:
+                updated_count, errors, total_users = await daily_manager.force_update_all(progress)
+            except Exception:
+                await progress.finish()
+                raise
             
-            await status_msg.edit(content=f"✅ **Force Update Complete**\nTotal: {total_users}\nUpdated: {updated_count}\nErrors: {errors}")
+            await progress.finish(f"✅ **Force Update Complete**\nTotal: {total_users}\nUpdated: {updated_count}\nErrors: {errors}")
             
             await self.update_message(interaction)
              
@@ -339,7 +345,7 @@ class Leaderboard(commands.Cog):
              await interaction.followup.send(f"❌ Could not find UUID for IGN: `{ign}`")
              return
              
-        daily_manager.register_user(str(user.id), ign, uuid)
+        await daily_manager.register_user(str(user.id), ign, uuid)
         await interaction.followup.send(f"✅ Manually registered {user.mention} as `{ign}` for daily tracking.")
 
 async def setup(bot: commands.Bot):
@@ -0,0 +1,169 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from aiohttp import web
+import time
+from core.config import OWNER_IDS, METRICS_PORT
+from core.logger import log_info, log_error, set_log_level, get_log_level, LEVELS
+from core import metrics
+from core.loop_monitor import loop_monitor
+from core.circuit_breaker import OPEN, HALF_OPEN
+from services.profile_backends import profile_backends
+from services.upstream import breakers
+
+# discord caps a field at 1024 characters and the whole embed at 6000, the list fields share what's left
+MAX_FIELD_CHARS = 900
+
+
+def _format_ms(value: float) -> str:
+    if value >= 1000:
+        return f"{value / 1000:.2f}s"
+    return f"{value:.0f}ms"
+
+
+def _format_bytes(value: float) -> str:
+    if value >= 1024 * 1024:
+        return f"{value / (1024 * 1024):.1f}MB"
+    if value >= 1024:
+        return f"{value / 1024:.1f}KB"
+    return f"{value:.0f}B"
+
+
+def _label(labels, key: str) -> str:
+    return dict(labels).get(key, "?")
+
+
+def _histogram_lines(name: str, label_key: str) -> list[str]:
+    lines = []
+    histograms = metrics.get_histograms(name)
+    for labels, h in sorted(histograms.items(), key=lambda item: item[1].total, reverse=True):
+        lines.append(f"`{_label(labels, label_key)}` {h.count:,}x • avg {_format_ms(h.avg)} • p95 {_format_ms(h.percentile(0.95))} • max {_format_ms(h.max)}")
+    return lines
+
+
+def _field_value(lines: list[str], empty: str) -> str:
+    # as many lines as fit, a field over the limit fails the whole response
+    if not lines:
+        return empty
+    value = "\n".join(lines)
+    shown = len(lines)
+    while len(value) > MAX_FIELD_CHARS:
+        shown -= 1
+        value = "\n".join(lines[:shown] + [f"… and {len(lines) - shown} more"])
+    return value
+
+
+class Perf(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.runner = None
+
+    async def cog_load(self):
+        if not METRICS_PORT:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics_handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        try:
+            await web.TCPSite(self.runner, "127.0.0.1", METRICS_PORT).start()
+            log_info(f"Metrics endpoint listening on http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            log_error(f"Failed to start metrics endpoint: {e}")
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def cog_unload(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def _metrics_handler(self, request):
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain")
+
+    def _create_embed(self) -> discord.Embed:
+        embed = discord.Embed(title="📈 Performance", color=0x00ff99)
+        uptime = int(time.time() - metrics.START_TIME)
+        embed.description = f"Uptime: {uptime // 3600}h {uptime % 3600 // 60}m • Gateway latency: {self.bot.latency * 1000:.0f}ms"
+        ready_ms = metrics.get_gauge("startup_ms", phase="ready")
+        if ready_ms:
+            embed.description += f"\nStartup: ready in {_format_ms(ready_ms)} (data {_format_ms(metrics.get_gauge('startup_ms', phase='data_load'))}, extensions {_format_ms(metrics.get_gauge('startup_ms', phase='extensions'))})"
+
+        api_lines = _histogram_lines("api_ms", "func")
+        for labels, errors in metrics.get_counters("api_errors_total").items():
+            api_lines.append(f"`{_label(labels, 'func')}` errors: {errors:,.0f}")
+        embed.add_field(name="API", value=_field_value(api_lines, "No calls yet."), inline=False)
+
+        upstream_lines = []
+        for name, breaker in breakers.items():
+            status = f"🔴 open, retry in {breaker.retry_in():.0f}s" if breaker.state == OPEN else ("🟡 half open" if breaker.state == HALF_OPEN else "🟢 closed")
+            upstream_lines.append(f"`{name}` {status} • {metrics.get_counter('circuit_failures_total', upstream=name):,.0f} failures • {metrics.get_counter('circuit_rejections_total', upstream=name):,.0f} rejected")
+        hypixel = profile_backends.get("hypixel")
+        if hypixel:
+            budget = hypixel.budget
+            status = f"disabled ({hypixel.disabled_reason})" if hypixel.disabled_reason else f"{budget.remaining}/{budget.limit} left, resets in {budget.seconds_until_reset():.0f}s"
+            upstream_lines.append(f"Hypixel key: {status}")
+        embed.add_field(name="Upstreams", value=_field_value(upstream_lines, "No requests yet."), inline=False)
+
+        hits = metrics.get_counter("cache_requests_total", result="hit")
+        misses = metrics.get_counter("cache_requests_total", result="miss")
+        cache_text = f"Hit rate: {metrics.get_cache_hit_rate() * 100:.1f}% ({hits:,.0f} hits / {misses:,.0f} misses)\nEntries: {metrics.get_gauge('cache_entries'):,.0f}"
+        embed.add_field(name="Cache", value=cache_text, inline=False)
+
+        sim = metrics.get_histograms("simulation_ms").get((), None)
+        if sim and sim.count:
+            sim_text = f"{sim.count:,} sims • avg {_format_ms(sim.avg)} • p95 {_format_ms(sim.percentile(0.95))} • max {_format_ms(sim.max)}\nRuns simulated: {metrics.get_counter('simulated_runs_total'):,.0f}"
+        else:
+            sim_text = "No simulations yet."
+        embed.add_field(name="Simulation", value=sim_text, inline=False)
+
+        file_lines = []
+        saved_bytes = metrics.get_counters("file_save_bytes_total")
+        for labels, h in metrics.get_histograms("file_save_ms").items():
+            file_name = _label(labels, "file")
+            file_lines.append(f"`{file_name}` {h.count:,} saves • avg {_format_ms(h.avg)} • {_format_bytes(saved_bytes.get(labels, 0))} written")
+        embed.add_field(name="File Saves", value=_field_value(file_lines, "No saves yet."), inline=False)
+
+        lag = metrics.get_histograms("loop_lag_ms").get((), None)
+        if lag and lag.count:
+            loop_text = f"Lag: avg {_format_ms(lag.avg)} • p95 {_format_ms(lag.percentile(0.95))} • max {_format_ms(lag.max)}\nStalls: {loop_monitor.stalls:,}"
+            if loop_monitor.last_stall:
+                stall_ts, stall_ms, task_name = loop_monitor.last_stall
+                loop_text += f" • last <t:{int(stall_ts)}:R> ({_format_ms(stall_ms)} in `{task_name}`)"
+        else:
+            loop_text = "Loop monitor not running."
+        embed.add_field(name="Event Loop", value=loop_text, inline=False)
+
+        queue_lines = [f"`{_label(labels, 'job')}` {value:,.0f} queued" for labels, value in metrics.get_gauges("scheduler_queue_depth").items()]
+        embed.add_field(name="Scheduler", value=_field_value(queue_lines, "Idle."), inline=False)
+
+        interaction_lines = _histogram_lines("interaction_latency_ms", "command")
+        embed.add_field(name="Interactions", value=_field_value(interaction_lines[:10], "No commands yet."), inline=False)
+
+        footer = f"Prometheus: 127.0.0.1:{METRICS_PORT}/metrics" if self.runner else "Prometheus endpoint disabled"
+        embed.set_footer(text=footer)
+        return embed
+
+    @app_commands.command(name="perf", description="Show bot performance metrics (owner only)")
+    async def perf(self, interaction: discord.Interaction):
+        if interaction.user.id not in OWNER_IDS:
+            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+            return
+
+        await interaction.response.send_message(embed=self._create_embed(), ephemeral=True)
+
+    @app_commands.describe(level="New log level")
+    @app_commands.choices(level=[app_commands.Choice(name=level, value=level) for level in LEVELS])
+    @app_commands.command(name="loglevel", description="Change the bot's log level without restarting (owner only)")
+    async def loglevel(self, interaction: discord.Interaction, level: str):
+        if interaction.user.id not in OWNER_IDS:
+            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+            return
+
+        old_level = get_log_level()
+        set_log_level(level)
+        log_info("Log level changed from %s to %s by %s", old_level, level, interaction.user)
+        await interaction.response.send_message(f"✅ Log level changed from `{old_level}` to `{level}`.", ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Perf(bot))
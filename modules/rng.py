@@ -2,11 +2,14 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.ui import Select, View, Modal, TextInput, Button
+import asyncio
 import time
-from core.config import RNG_DROPS, DROP_EMOJIS, DROP_IDS, CHEST_COSTS, GLOBAL_DROPS, OWNER_IDS
+from core.config import RNG_DROPS, DROP_EMOJIS, DROP_IDS, GLOBAL_DROPS, OWNER_IDS, PRICE_TREND_WINDOW
 from core.logger import log_info, log_debug, log_error
-from services.api import get_uuid, get_all_prices, get_dungeon_runs, get_prices_expiry
-from services.rng_manager import rng_manager
+from core.metrics import inc, observe
+from services.api import get_uuid, get_all_prices, get_dungeon_runs, get_prices_expiry, get_price_stats, get_prices_version
+from services.rng_manager import rng_manager, calculate_item_profit
+from services import rng_simulation
 from services.link_manager import link_manager
 
 def format_trunc(value: float) -> str:
@@ -40,7 +43,7 @@ class RngAmountModal(Modal):
             if amount < 0:
                 raise ValueError("Amount must be non-negative")
                 
-            rng_manager.set_drop_count(
+            await rng_manager.set_drop_count(
                 self.parent_view.target_user_id, 
                 self.parent_view.current_floor, 
                 self.parent_view.current_item, 
@@ -124,14 +127,14 @@ class RngActionButton(discord.ui.Button):
             if self.parent_view.current_item in GLOBAL_DROPS:
                 floor_key = "Global"
             
-            rng_manager.update_drop(self.parent_view.target_user_id, floor_key, self.parent_view.current_item, 1)
+            await rng_manager.update_drop(self.parent_view.target_user_id, floor_key, self.parent_view.current_item, 1)
             log_info(f"RNG View ({self.parent_view.target_user_name}): Added {self.parent_view.current_item}")
         elif self.action == "subtract":
             floor_key = self.parent_view.current_floor
             if self.parent_view.current_item in GLOBAL_DROPS:
                 floor_key = "Global"
 
-            rng_manager.update_drop(self.parent_view.target_user_id, floor_key, self.parent_view.current_item, -1)
+            await rng_manager.update_drop(self.parent_view.target_user_id, floor_key, self.parent_view.current_item, -1)
             log_info(f"RNG View ({self.parent_view.target_user_name}): Removed {self.parent_view.current_item}")
         elif self.action == "back":
             log_info(f"RNG View ({self.parent_view.target_user_name}): Go back")
@@ -148,6 +151,10 @@ class RngActionButton(discord.ui.Button):
              await interaction.response.send_modal(modal)
              return
              
+        elif self.action == "simulate":
+             await self.parent_view.send_simulation(interaction)
+             return
+             
         elif self.action == "filter_combined":
              self.parent_view.filter_mode = "COMBINED"
         elif self.action == "filter_master":
@@ -195,6 +202,9 @@ class RngView(View):
             self.add_item(RngActionButton(self, None, style_normal, "rng_filter_normal", "filter_normal"))
             self.children[-1].emoji = discord.PartialEmoji.from_str("<:SkyBlock_items_catacombs:1448690272786448545>")
             self.children[-1].label = None
+
+            if rng_simulation.is_available():
+                self.add_item(RngActionButton(self, "Simulate", discord.ButtonStyle.primary, "rng_simulate", "simulate"))
         else:
             self.add_item(RngFloorSelect(self))
             
@@ -212,14 +222,14 @@ class RngView(View):
             self.children[-1].label = None
 
 
-    def _calculate_item_details(self, item_name: str, count: int, prices: dict) -> tuple[float, list[str]]:
+    def _get_label(self, item_name: str) -> str:
         emoji = DROP_EMOJIS.get(item_name)
-        label = f"{emoji} {item_name}" if emoji else item_name
+        return f"{emoji} {item_name}" if emoji else item_name
+
+    def _calculate_item_details(self, item_name: str, count: int, prices: dict) -> tuple[float, list[str]]:
+        label = self._get_label(item_name)
         
-        item_id = DROP_IDS.get(item_name)
-        price = float(prices.get(item_id, 0))
-        chest_cost = CHEST_COSTS.get(item_name, 0)
-        profit = max(0, price - chest_cost)
+        price, chest_cost, profit = calculate_item_profit(item_name, prices)
         
         val = profit * count
         
@@ -237,9 +247,52 @@ class RngView(View):
             return floor_runs_data.get("normal", 0)
         return 0
 
+    async def send_simulation(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        floor = self.current_floor
+        prices = await get_all_prices()
+        totals = rng_manager.get_totals(self.target_user_id, prices, get_prices_version())
+        values = {item: rng_manager.get_item_profit(item) for item in RNG_DROPS[floor]}
+        
+        # DROP_CHANCES are master mode odds, so the simulation always uses master completions whatever the filter
+        floor_runs_data = self.run_counts.get(floor, {"normal": 0, "master": 0})
+        runs = floor_runs_data if isinstance(floor_runs_data, int) else floor_runs_data.get("master", 0)
+        actual = totals["floors"].get(floor, {}).get("value", 0.0) if runs > 0 else None
+        
+        log_info(f"RNG View ({self.target_user_name}): Simulating {floor} over {runs or 'default'} master runs")
+        # a million players takes a couple of seconds, that can't happen on the event loop
+        result = await asyncio.to_thread(rng_simulation.simulate_floor, RNG_DROPS[floor], values, runs or None, actual)
+        if result is None:
+            await interaction.followup.send("❌ No drop chances are known for this floor.", ephemeral=True)
+            return
+        observe("rng_simulation_ms", result["elapsed_ms"])
+        inc("rng_simulations_total")
+        await interaction.followup.send(embed=self._create_simulation_embed(floor, result), ephemeral=True)
+
+    def _create_simulation_embed(self, floor: str, result: dict) -> discord.Embed:
+        embed = discord.Embed(title=f"{floor} Simulation", color=0x00ff99)
+        bands = result["bands"]
+        desc = [
+            f"**Expected Profit/Run:** {format_trunc(result['expected'])}",
+            f"**Middle 50%:** {format_trunc(bands[25])} - {format_trunc(bands[75])}",
+            f"**Middle 90%:** {format_trunc(bands[5])} - {format_trunc(bands[95])}",
+        ]
+        if result["actual"] is not None:
+            desc.append(f"**Your Profit/Run:** {format_trunc(result['actual'])} (luckier than {result['percentile']:.0f}% of players)")
+        embed.description = "\n".join(desc)
+        
+        lines = [
+            f"{self._get_label(item)}: {first[50]:,} (90%: {first[90]:,})"
+            for item, first in result["first_drop"].items()
+        ]
+        embed.add_field(name="Runs Until First Drop (median)", value="\n".join(lines), inline=False)
+        embed.set_footer(text=f"{result['players']:,} simulated players × {result['runs']:,} master runs • drop chances are estimates")
+        return embed
+
     async def get_embed(self):
         embed = discord.Embed(color=0x00ff99)
         prices = await get_all_prices()
+        totals = rng_manager.get_totals(self.target_user_id, prices, get_prices_version())
         
         if self.current_item:
             floor_key = self.current_floor
@@ -257,6 +310,11 @@ class RngView(View):
             
             desc_lines = [f"**Current Count:** {count}", f"**Avg Price:** {price_text}", f"**Chest Cost:** {format_trunc(chest_cost)}", f"**Total Profit:** {val_text}"]
             
+            trend = get_price_stats(DROP_IDS.get(self.current_item), PRICE_TREND_WINDOW)
+            if trend and trend["samples"] > 1:
+                arrow = "📈" if trend["change"] > 0.01 else "📉" if trend["change"] < -0.01 else "➖"
+                desc_lines.append(f"**7d Range:** {format_trunc(trend['min'])} - {format_trunc(trend['max'])} (avg {format_trunc(trend['avg'])}) {arrow} {trend['change'] * 100:+.1f}%")
+            
             floor_runs_data = self.run_counts.get(self.current_floor, {"normal": 0, "master": 0})
             runs = self._calculate_runs_for_filter(floor_runs_data)
 
@@ -273,12 +331,12 @@ class RngView(View):
             embed.title = f"{self.current_floor} Drops"
             stats = rng_manager.get_floor_stats(self.target_user_id, self.current_floor)
             desc = []
-            floor_total_val = 0
+            floor_total_val = totals["floors"].get(self.current_floor, {}).get("value", 0)
             
             for item in RNG_DROPS[self.current_floor]:
                 count = stats.get(item, 0)
-                val, label, price, chest_cost, profit = self._calculate_item_details(item, count, prices)
-                floor_total_val += val
+                label = self._get_label(item)
+                price, chest_cost, profit = rng_manager.get_item_value(item)
                 
                 price_str = f"({format_trunc(profit)})" if price > 0 else ""
 
@@ -290,7 +348,7 @@ class RngView(View):
             floor_runs_data = self.run_counts.get(self.current_floor, {"normal": 0, "master": 0})
             runs = self._calculate_runs_for_filter(floor_runs_data)
 
-            log_debug(f"Floor {self.current_floor}: Runs={runs}, Profit={floor_total_val}")
+            log_debug("Floor %s: Runs=%s, Profit=%s", self.current_floor, runs, floor_total_val)
             
             if floor_total_val > 0:
                 desc.append(f"\n**Floor Profit:** {format_trunc(floor_total_val)}")
@@ -311,31 +369,28 @@ class RngView(View):
             user_stats = rng_manager.get_user_stats(self.target_user_id)
             desc = []
             
-            total_drops_found = False
-            grand_total = 0
+            total_drops_found = totals["count"] > 0
+            grand_total = totals["value"]
             
             for floor_name in RNG_DROPS.keys():
+                if not totals["floors"].get(floor_name, {}).get("count"):
+                    continue
                 floor_stats = user_stats.get(floor_name, {})
                 for item_name in RNG_DROPS[floor_name]:
                     count = floor_stats.get(item_name, 0)
                     if count > 0:
-                        total_drops_found = True
-                        val, label, price, chest_cost, profit = self._calculate_item_details(item_name, count, prices)
-                        grand_total += val
-                        desc.append(f"**{label}:** {count}")
+                        desc.append(f"**{self._get_label(item_name)}:** {count}")
 
             global_stats = user_stats.get("Global", {})
             has_global = False
             global_desc = []
             
-            for item_name in GLOBAL_DROPS:
-                count = global_stats.get(item_name, 0)
-                if count > 0:
-                    has_global = True
-                    total_drops_found = True
-                    val, label, price, chest_cost, profit = self._calculate_item_details(item_name, count, prices)
-                    grand_total += val
-                    global_desc.append(f"**{label}:** {count}")
+            if totals["floors"].get("Global", {}).get("count"):
+                for item_name in GLOBAL_DROPS:
+                    count = global_stats.get(item_name, 0)
+                    if count > 0:
+                        has_global = True
+                        global_desc.append(f"**{self._get_label(item_name)}:** {count}")
             
             if has_global:
                  desc.append("\n**Global Drops**")
@@ -408,7 +463,7 @@ class Rng(commands.Cog):
             uuid = await get_uuid(target_ign)
             if uuid:
                 run_counts = await get_dungeon_runs(uuid)
-                log_debug(f"Fetched run counts for {target_ign}: {run_counts}")
+                log_debug("Fetched run counts for %s: %s", target_ign, run_counts)
         
         view = RngView(target_user.id, target_user.display_name, interaction.user.id, run_counts, target_ign)
         embed = await view.get_embed()
@@ -425,7 +480,7 @@ class Rng(commands.Cog):
             await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
             return
             
-        rng_manager.set_default_target(str(interaction.user.id), str(user.id))
+        await rng_manager.set_default_target(str(interaction.user.id), str(user.id))
         
         await interaction.response.send_message(f"✅ Default target for /rng set to **{user.mention}**.", ephemeral=True)
 
@@ -17,7 +17,7 @@ def package_release():
     excludes = {
         '.git', '.gitignore', '.venv', 'venv', '__pycache__', 
         '.vscode', '.idea', 'release', 'scripts', '.github',
-        '.gemini', 'setup.py', 'secrets.py', '.env', 'data'
+        '.gemini', 'setup.py', 'secrets.py', '.env', 'data', 'benchmarks'
     }
     
     print(f"Packaging release from {project_root}...")
@@ -1,17 +1,41 @@
-import json
 import os
 import time
 import aiofiles
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+from core.config import PRETTY_JSON, DAILY_UPDATE_BATCH, POLL_MAX_BACKOFF
 from core.logger import log_info, log_error, log_debug
+from core.metrics import inc, observe, set_gauge
+from core.serializer import dumps, loads
 from services.xp_calculations import get_dungeon_level
 from services.api import get_uuid, get_dungeon_xp
+from services.rtca_precompute import rtca_precompute
 from datetime import timedelta
 import asyncio
 
 DAILY_DATA_FILE = "data/daily_data.json"
 
+
+def log_poll_pass(name: str, polled: int, changed: int):
+    unchanged = polled - changed
+    ratio = unchanged / polled if polled else 0.0
+    set_gauge("poll_unchanged_ratio", ratio)
+    log_info(f"{name}: {polled} polled, {unchanged} unchanged ({ratio:.0%})")
+
+def day_start(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def month_start(now: datetime) -> datetime:
+    return day_start(now).replace(day=1)
+
+def next_month_start(now: datetime) -> datetime:
+    start = month_start(now)
+    return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+def previous_month_start(now: datetime) -> datetime:
+    return month_start(month_start(now) - timedelta(days=1))
+
+
 class DailyManager:
     def __init__(self):
         self.data = {
@@ -23,25 +47,33 @@ class DailyManager:
             "last_monthly_reset": 0,
             "last_updated": 0
         }
+        # uuid -> discord ids tracking it, each uuid gets fetched once per pass no matter how many accounts share it
+        self.subscribers: Dict[str, Set[str]] = {}
+        # bumped on every change, the leaderboards are only rebuilt when it moves
+        self.data_version = 0
+        self.leaderboards: Dict[str, Tuple[int, list]] = {}
+        self.save_lock = asyncio.Lock()
+        # polling state per uuid, only kept in memory so a restart polls everyone again.
+        # last_checked is when we last confirmed the xp, current_xp's timestamp only moves when it changes
+        self.poll_pass = 0
+        self.next_poll_pass: Dict[str, int] = {}
+        self.unchanged_streak: Dict[str, int] = {}
+        self.last_checked: Dict[str, int] = {}
+
     async def initialize(self):
         await self.load_data()
 
     def get_reset_timestamps(self) -> Tuple[int, int]:
         now = datetime.now(timezone.utc)
-        target_daily = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-        next_daily_ts = int(target_daily.timestamp())
-        
-        if now.month == 12:
-            target_monthly = now.replace(year=now.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-        else:
-            target_monthly = now.replace(month=now.month + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
-        next_monthly_ts = int(target_monthly.timestamp())
-        
+        next_daily_ts = int((day_start(now) + timedelta(days=1)).timestamp())
+        next_monthly_ts = int(next_month_start(now).timestamp())
         return next_daily_ts, next_monthly_ts
 
-    async def force_update_all(self, status_message=None):
-        tracked_users = self.get_tracked_users()
-        total_users = len(tracked_users)
+    # interval spaces out request starts and deadline (unix time) stops starting new ones,
+    # the pre-reset refresh uses both so it stays inside the rate limit and finishes before midnight
+    async def force_update_all(self, progress=None, concurrency: int = 5, interval: float = 0.0, deadline: Optional[float] = None):
+        tracked_uuids = self.get_tracked_uuids()
+        total_users = len(tracked_uuids)
         
         if total_users == 0:
             return 0, 0, 0 # updated, errors, total
@@ -49,37 +81,51 @@ class DailyManager:
         updated_count = 0
         errors = 0
         processed_count = 0
-        sem = asyncio.Semaphore(5)
+        changed_count = 0
+        skipped = 0
+        sem = asyncio.Semaphore(concurrency)
+        next_start = time.monotonic()
+        pending = []
         
-        async def update_user(user_id, uuid):
-            nonlocal updated_count, errors, processed_count
+        async def update_user(uuid):
+            nonlocal updated_count, errors, processed_count, changed_count, skipped, next_start, pending
             async with sem:
                 try:
-                    if not uuid:
-                        log_error(f"Skipping update for {user_id}: No UUID")
-                        errors += 1
+                    if interval:
+                        now = time.monotonic()
+                        wait = next_start - now
+                        next_start = max(now, next_start) + interval
+                        if wait > 0:
+                            await asyncio.sleep(wait)
+                    if deadline is not None and time.time() >= deadline:
+                        skipped += 1
+                        return
+                    xp_data = await get_dungeon_xp(uuid)
+                    if xp_data:
+                        pending.append((uuid, xp_data, int(time.time())))
+                        updated_count += 1
+                        if len(pending) >= DAILY_UPDATE_BATCH:
+                            batch, pending = pending, []
+                            changed_count += await self.apply_updates(batch)
                     else:
-                        xp_data = await get_dungeon_xp(uuid)
-                        if xp_data:
-                            self.update_user_data(user_id, xp_data)
-                            updated_count += 1
-                        else:
-                            errors += 1
+                        errors += 1
                 except Exception as e:
-                    log_error(f"Error updating user {user_id}: {e}")
+                    log_error(f"Error updating {uuid}: {e}")
                     errors += 1
                 finally:
                     processed_count += 1
-                    if status_message and (processed_count <= 5 or processed_count % 5 == 0):
-                        try:
-                            asyncio.create_task(status_message.edit(
-                                content=f"🔄 **Force Update In Progress**\nProcessing: {processed_count}/{total_users}\nUpdated: {updated_count}\nErrors: {errors}"
-                            ))
-                        except Exception:
-                            pass
-
-        tasks = [update_user(uid, uuid) for uid, uuid in tracked_users]
+                    set_gauge("scheduler_queue_depth", total_users - processed_count, job="force_update")
+                    if progress:
+                        progress.update(f"🔄 **Force Update In Progress**\nProcessing: {processed_count}/{total_users}\nUpdated: {updated_count}\nErrors: {errors}")
+
+        tasks = [update_user(uuid) for uuid in tracked_uuids]
+        set_gauge("scheduler_queue_depth", total_users, job="force_update")
         await asyncio.gather(*tasks)
+        if pending:
+            changed_count += await self.apply_updates(pending)
+        log_poll_pass("Update pass", updated_count, changed_count)
+        if skipped:
+            log_info(f"Update pass hit its deadline, skipped {skipped}/{total_users} players")
                 
         return updated_count, errors, total_users
 
@@ -90,78 +136,226 @@ class DailyManager:
             return
 
         try:
-            async with aiofiles.open(DAILY_DATA_FILE, 'r') as f:
+            async with aiofiles.open(DAILY_DATA_FILE, 'rb') as f:
                 content = await f.read()
-                loaded = json.loads(content)
-                for key in self.data:
-                    if key in loaded:
-                        self.data[key] = loaded[key]
+                self.set_data(loads(content))
             log_info(f"Loaded daily data for {len(self.data.get('users', {}))} users.")
         except Exception as e:
             log_error(f"Failed to load daily data: {e}")
 
+    def set_data(self, loaded: dict):
+        for key in self.data:
+            if key in loaded:
+                self.data[key] = loaded[key]
+        self.data_version += 1
+        self.subscribers = {}
+        for user_id, info in self.data["users"].items():
+            self._subscribe(info.get("uuid"), user_id)
+
+    def _subscribe(self, uuid: str, user_id: str):
+        if uuid:
+            self.subscribers.setdefault(uuid, set()).add(user_id)
+
+    def _unsubscribe(self, uuid: str, user_id: str):
+        user_ids = self.subscribers.get(uuid)
+        if user_ids is None:
+            return
+        user_ids.discard(user_id)
+        if not user_ids:
+            # nobody left to fan out to, so it drops out of the polling set
+            del self.subscribers[uuid]
+            # if they're tracked again later they start on a fresh backoff
+            for poll_state in (self.next_poll_pass, self.unchanged_streak, self.last_checked):
+                poll_state.pop(uuid, None)
+            rtca_precompute.forget(uuid)
+            log_debug("No subscribers left for %s, no longer polling it", uuid)
+
+    def _drop_xp(self, user_id: str):
+        for key in ["current_xp", "daily_snapshots", "monthly_snapshots"]:
+            self.data[key].pop(user_id, None)
+
     async def _save_data(self):
+        # every change to self.data ends with a save, so this is where the version moves
+        self.data_version += 1
+        start = time.perf_counter()
         try:
-            async with aiofiles.open(DAILY_DATA_FILE, 'w') as f:
-                await f.write(json.dumps(self.data, indent=4))
+            content = dumps(self.data, pretty=PRETTY_JSON)
+            # two overlapping writes to the same file can interleave
+            async with self.save_lock:
+                async with aiofiles.open(DAILY_DATA_FILE, 'wb') as f:
+                    await f.write(content)
         except Exception as e:
             log_error(f"Failed to save daily data: {e}")
+            return
+        file_name = os.path.basename(DAILY_DATA_FILE)
+        observe("file_save_ms", (time.perf_counter() - start) * 1000, file=file_name)
+        inc("file_save_bytes_total", len(content), file=file_name)
+        set_gauge("file_size_bytes", len(content), file=file_name)
 
     async def register_user(self, user_id: str, ign: str, uuid: str):
         user_id = str(user_id)
-        if user_id not in self.data["users"]:
+        info = self.data["users"].get(user_id)
+        if info is None:
             self.data["users"][user_id] = {
                 "ign": ign,
                 "uuid": uuid
             }
+            self._subscribe(uuid, user_id)
             await self._save_data()
             log_info(f"Registered user {ign} ({user_id}) for daily tracking.")
-        elif self.data["users"][user_id]["ign"] != ign:
-             self.data["users"][user_id]["ign"] = ign
+        elif info["uuid"] != uuid:
+            # linked to a different account, the old snapshots would count the other player's xp
+            self._unsubscribe(info["uuid"], user_id)
+            self._drop_xp(user_id)
+            info["ign"] = ign
+            info["uuid"] = uuid
+            self._subscribe(uuid, user_id)
+            await self._save_data()
+            log_info(f"Switched daily tracking for {user_id} to {ign}.")
+        elif info["ign"] != ign:
+             info["ign"] = ign
              await self._save_data()
 
-    def get_tracked_users(self) -> List[Tuple[str, str]]:
-        return [(uid, info["uuid"]) for uid, info in self.data["users"].items()]
-
-    async def update_user_data(self, user_id: str, xp_data: dict):
+    async def unregister_user(self, user_id: str) -> bool:
         user_id = str(user_id)
+        info = self.data["users"].pop(user_id, None)
+        if info is None:
+            return False
+        self._unsubscribe(info.get("uuid"), user_id)
+        self._drop_xp(user_id)
+        await self._save_data()
+        log_info(f"Stopped daily tracking for {info.get('ign')} ({user_id}).")
+        return True
+
+    def get_user_uuid(self, user_id: str) -> Optional[str]:
+        info = self.data["users"].get(str(user_id))
+        return info["uuid"] if info else None
+
+    def get_tracked_uuids(self) -> List[str]:
+        return list(self.subscribers)
+
+    def get_subscriber_count(self) -> int:
+        return sum(len(user_ids) for user_ids in self.subscribers.values())
+
+    def start_poll_pass(self) -> List[str]:
+        # players whose xp keeps coming back the same are polled less often, see _record_poll
+        self.poll_pass += 1
+        return [uuid for uuid in self.subscribers if self.next_poll_pass.get(uuid, 0) <= self.poll_pass]
+
+    def _record_poll(self, uuid: str, changed: bool, now: int, scheduled: bool):
+        self.last_checked[uuid] = now
+        if not scheduled:
+            # force updates and the pre-reset refresh poll everyone, an idle player shouldn't back off further
+            # because of them. a change they catch still means the player is active again
+            if changed:
+                self.unchanged_streak[uuid] = 0
+                self.next_poll_pass.pop(uuid, None)
+            return
+        streak = 0 if changed else self.unchanged_streak.get(uuid, 0) + 1
+        self.unchanged_streak[uuid] = streak
+        # every pass, then every 2nd, 4th... once it has been idle for a while
+        self.next_poll_pass[uuid] = self.poll_pass + min(2 ** max(0, streak - 1), POLL_MAX_BACKOFF)
+
+    def _is_unchanged(self, user_id: str, xp_data: dict) -> bool:
+        current = self.data["current_xp"].get(user_id)
+        return (current is not None
+                and current["cata_xp"] == xp_data["catacombs"]
+                and current["classes"] == xp_data["classes"]
+                and user_id in self.data["daily_snapshots"]
+                and user_id in self.data["monthly_snapshots"])
+
+    async def apply_updates(self, batch: List[Tuple[str, dict, int]], scheduled: bool = False) -> int:
+        # batch is (uuid, xp_data, fetched_at) from one polling pass, written to every subscriber and saved once.
+        # returns how many of the uuids actually changed, unchanged ones cost no write, save or leaderboard rebuild.
+        # only results from start_poll_pass are scheduled, the rest don't count towards backoff
         now = int(time.time())
+        applied = 0
+        changed_uuids = 0
+        rolled = False
         
-        self.data["current_xp"][user_id] = {
-            "timestamp": now,
-            "cata_xp": xp_data["catacombs"],
-            "classes": xp_data["classes"]
-        }
-        
-        if user_id not in self.data["daily_snapshots"]:
-             self.data["daily_snapshots"][user_id] = self.data["current_xp"][user_id]
+        # resets roll at the time each result was fetched, not when the batch lands. a pass that straddles
+        # midnight applies its last few pre-midnight results after the boundary
+        for uuid, xp_data, fetched_at in sorted(batch, key=lambda entry: entry[2]):
+            rolled |= self._roll_resets(datetime.fromtimestamp(fetched_at, timezone.utc))
+            changed = False
+            for user_id in self.subscribers.get(uuid, ()):
+                if self._is_unchanged(user_id, xp_data):
+                    continue
+                previous = self.data["current_xp"].get(user_id)
+                if previous is not None and previous["timestamp"] > fetched_at:
+                    # something newer already landed
+                    continue
+                changed = True
+                current = {
+                    "timestamp": fetched_at,
+                    "cata_xp": xp_data["catacombs"],
+                    "classes": xp_data["classes"]
+                }
+                self.data["current_xp"][user_id] = current
+                
+                # fetched before a reset that already happened, so it's the closing value of the old period
+                # and the new one is measured from it
+                if user_id not in self.data["daily_snapshots"] or fetched_at < self.data.get("last_daily_reset", 0):
+                     self.data["daily_snapshots"][user_id] = current
+                
+                if user_id not in self.data["monthly_snapshots"] or fetched_at < self.data.get("last_monthly_reset", 0):
+                     self.data["monthly_snapshots"][user_id] = current
+                applied += 1
+            self._record_poll(uuid, changed, now, scheduled)
+            changed_uuids += changed
+            # keeps /rtca instant for tracked players, only re-simulated when their xp moved
+            if "profile_classes" in xp_data and (changed or not rtca_precompute.has_results(uuid)):
+                rtca_precompute.schedule(uuid, self.subscribers.get(uuid, ()), xp_data["profile_classes"], xp_data["class_boosts"])
+        rolled |= self._roll_resets(datetime.fromtimestamp(now, timezone.utc))
         
-        if user_id not in self.data["monthly_snapshots"]:
-             self.data["monthly_snapshots"][user_id] = self.data["current_xp"][user_id]
-             
+        inc("poll_results_total", changed_uuids, result="changed")
+        inc("poll_results_total", len(batch) - changed_uuids, result="unchanged")
+        # still a poll, the leaderboard's "last updated" shouldn't go stale just because nobody played
         self.data["last_updated"] = now
+        if not applied and not rolled:
+            return 0
         await self._save_data()
+        log_debug("Applied %d polled results, %d changed (%d users written)", len(batch), changed_uuids, applied)
+        return changed_uuids
 
-    async def check_resets(self):
-        now = datetime.now(timezone.utc)
-        
-        last_reset_ts = self.data.get("last_daily_reset", 0)
-        last_reset_date = datetime.fromtimestamp(last_reset_ts, timezone.utc)
-        
-        if now.date() > last_reset_date.date():
+    async def check_resets(self) -> bool:
+        if self._roll_resets(datetime.now(timezone.utc)):
+            await self._save_data()
+            return True
+        return False
+
+    def _roll_resets(self, now: datetime) -> bool:
+        rolled = False
+        today = day_start(now)
+        if int(today.timestamp()) > self.data.get("last_daily_reset", 0):
             log_info("Performing Daily Reset...")
-            self.data["daily_snapshots"] = self.data["current_xp"].copy()
-            self.data["last_daily_reset"] = int(now.timestamp())
-        await self._save_data()
-             
-        last_month_ts = self.data.get("last_monthly_reset", 0)
-        last_month_date = datetime.fromtimestamp(last_month_ts, timezone.utc)
+            self.data["daily_snapshots"] = self._baselines(today - timedelta(days=1))
+            self.data["last_daily_reset"] = int(today.timestamp())
+            rolled = True
         
-        if now.month != last_month_date.month or now.year != last_month_date.year:
+        this_month = month_start(now)
+        if int(this_month.timestamp()) > self.data.get("last_monthly_reset", 0):
             log_info("Performing Monthly Reset...")
-            self.data["monthly_snapshots"] = self.data["current_xp"].copy()
-            self.data["last_monthly_reset"] = int(now.timestamp())
-            await self._save_data()
+            self.data["monthly_snapshots"] = self._baselines(previous_month_start(now))
+            self.data["last_monthly_reset"] = int(this_month.timestamp())
+            rolled = True
+        return rolled
+
+    def _baselines(self, period_start: datetime) -> dict:
+        # the last xp seen in the period that just ended is its closing value. anything older means the bot
+        # was down across more than one boundary, those users get a fresh baseline on their next poll instead
+        # of having several days of gains credited to today
+        cutoff = int(period_start.timestamp())
+        baselines = {user_id: entry for user_id, entry in self.data["current_xp"].items() if self._last_seen(user_id, entry) >= cutoff}
+        dropped = len(self.data["current_xp"]) - len(baselines)
+        if dropped:
+            log_info(f"{dropped} users had no xp from before the reset, their baseline is taken on the next poll")
+        return baselines
+
+    def _last_seen(self, user_id: str, entry: dict) -> int:
+        info = self.data["users"].get(user_id)
+        checked = self.last_checked.get(info["uuid"], 0) if info else 0
+        return max(entry.get("timestamp", 0), checked)
 
     def get_last_updated(self) -> int:
         return self.data.get("last_updated", 0)
@@ -202,22 +396,28 @@ class DailyManager:
         return stats
 
     def get_leaderboard(self, type="daily"):
+        cached = self.leaderboards.get(type)
+        if cached and cached[0] == self.data_version:
+            return cached[1]
         snapshot_key = "daily_snapshots" if type == "daily" else "monthly_snapshots"
-        leaderboard_map = {}
+        leaderboard = []
         
-        for user_id, info in self.data["users"].items():
-            stats = self._calculate_stats(user_id, snapshot_key)
-            if stats:
-                ign = info["ign"]
-                if ign not in leaderboard_map or stats["cata_gained"] > leaderboard_map[ign]["gained"]:
-                    leaderboard_map[ign] = {
-                        "ign": ign,
+        # one row per player, if several accounts track them the one with the oldest snapshot shows the most
+        for user_ids in self.subscribers.values():
+            best = None
+            for user_id in user_ids:
+                stats = self._calculate_stats(user_id, snapshot_key)
+                if stats and (best is None or stats["cata_gained"] > best["gained"]):
+                    best = {
+                        "ign": self.data["users"][user_id]["ign"],
                         "gained": stats["cata_gained"],
                         "user_id": user_id
                     }
+            if best:
+                leaderboard.append(best)
         
-        leaderboard = list(leaderboard_map.values())
         leaderboard.sort(key=lambda x: x["gained"], reverse=True)
+        self.leaderboards[type] = (self.data_version, leaderboard)
         return leaderboard
 
     # i have no idea why uuid was invalid in the first place, but i've made this function to fix it in the future
@@ -225,7 +425,8 @@ class DailyManager:
     async def sanitize_data(self):
         log_info("Sanitizing daily data...")
         updates = False
-        for user_id, info in self.data["users"].items():
+        # runs in the background now, users can register while we're waiting on playerdb
+        for user_id, info in list(self.data["users"].items()):
             uuid = info.get("uuid", "")
             ign = info.get("ign", "")
             
@@ -233,7 +434,9 @@ class DailyManager:
                 log_info(f"Detected invalid UUID for {ign} ({uuid}). Fetching correct UUID...")
                 new_uuid = await get_uuid(ign)
                 if new_uuid:
+                    self._unsubscribe(uuid, user_id)
                     self.data["users"][user_id]["uuid"] = new_uuid
+                    self._subscribe(new_uuid, user_id)
                     log_info(f"Fixed UUID for {ign}: {new_uuid}")
                     updates = True
                 else:
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+from core.config import DROP_IDS, PRICE_HISTORY_RETENTION
+from core.logger import log_info, log_error, log_debug
+from core.serializer import dumps, loads
+
+PRICE_HISTORY_FILE = "data/price_history.jsonl"
+
+
+class PriceHistory:
+    def __init__(self):
+        self.snapshots: List[dict] = []
+        self.last_expiry: Optional[float] = None
+        # lines in the file, pruned snapshots stay there until the next compaction
+        self.file_lines = 0
+        self.lock = asyncio.Lock()
+        self.loaded = False
+
+    async def initialize(self):
+        if self.loaded:
+            return
+        async with self.lock:
+            await asyncio.to_thread(self.load_history)
+        self.loaded = True
+
+    def load_history(self):
+        if not os.path.exists(PRICE_HISTORY_FILE):
+            self.snapshots = []
+            log_info("No price history file found, starting fresh.")
+            return
+
+        cutoff = time.time() - PRICE_HISTORY_RETENTION
+        snapshots = []
+        lines = 0
+        try:
+            with open(PRICE_HISTORY_FILE, 'rb') as f:
+                for line in f:
+                    lines += 1
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        snapshot = loads(line)
+                    except ValueError:
+                        # half-written line from a crash, the rest of the file is still fine
+                        continue
+                    if snapshot.get("ts", 0) >= cutoff:
+                        snapshots.append(snapshot)
+            self.snapshots = snapshots
+            log_info(f"Loaded {len(self.snapshots)} price snapshots.")
+        except Exception as e:
+            log_error(f"Failed to load price history: {e}")
+            self.snapshots = []
+            return
+
+        self.file_lines = lines
+        if lines > len(snapshots):
+            self._compact(snapshots)
+
+    def _compact(self, snapshots: List[dict]):
+        # the file is only appended to, so expired and torn lines are dropped by rewriting it
+        try:
+            content = b"".join(dumps(snapshot) + b"\n" for snapshot in snapshots)
+            tmp_path = PRICE_HISTORY_FILE + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, PRICE_HISTORY_FILE)
+        except Exception as e:
+            log_error(f"Failed to compact price history: {e}")
+            return
+        log_debug("Compacted price history from %d to %d lines", self.file_lines, len(snapshots))
+        self.file_lines = len(snapshots)
+
+    def _append(self, line: bytes):
+        with open(PRICE_HISTORY_FILE, 'ab') as f:
+            f.write(line)
+
+    def latest(self) -> Optional[dict]:
+        return self.snapshots[-1] if self.snapshots else None
+
+    async def record(self, prices: dict, expiry: Optional[float] = None):
+        if expiry is not None and expiry == self.last_expiry:
+            return
+        self.last_expiry = expiry
+
+        tracked = {}
+        for item_id in DROP_IDS.values():
+            price = prices.get(item_id)
+            if price:
+                tracked[item_id] = float(price)
+        if not tracked:
+            return
+
+        snapshot = {"ts": int(time.time()), "prices": tracked}
+        async with self.lock:
+            try:
+                await asyncio.to_thread(self._append, dumps(snapshot) + b"\n")
+                self.file_lines += 1
+            except Exception as e:
+                log_error(f"Failed to append price snapshot: {e}")
+
+            self.snapshots.append(snapshot)
+            cutoff = snapshot["ts"] - PRICE_HISTORY_RETENTION
+            while self.snapshots and self.snapshots[0]["ts"] < cutoff:
+                self.snapshots.pop(0)
+            # a long running bot would otherwise keep everything it ever recorded on disk
+            if self.file_lines > 2 * len(self.snapshots):
+                await asyncio.to_thread(self._compact, list(self.snapshots))
+        log_debug("Recorded price snapshot (%d items)", len(tracked))
+
+    def get_stats(self, item_id: str, window: int) -> Optional[Dict[str, float]]:
+        cutoff = time.time() - window
+        values = []
+        for snapshot in reversed(self.snapshots):
+            if snapshot["ts"] < cutoff:
+                break
+            price = snapshot["prices"].get(item_id)
+            if price:
+                values.append(price)
+
+        if not values:
+            return None
+
+        # values are newest first
+        first, last = values[-1], values[0]
+        return {
+            "min": min(values),
+            "max": max(values),
+            "avg": sum(values) / len(values),
+            "last": last,
+            "change": (last - first) / first if first else 0.0,
+            "samples": len(values)
+        }
+
+price_history = PriceHistory()
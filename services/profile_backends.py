@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+from typing import List, Optional
+from core.config import HYPIXEL_API_KEY, PROFILE_BACKENDS, PROFILE_FIXTURE_DIR
+from core.logger import log_info, log_error, log_debug
+from core.metrics import inc, set_gauge
+from core.serializer import loads
+from services.upstream import get_json, get_breaker
+
+WORKER_URL = "https://adjectilsbackend.adjectivenoun3215.workers.dev/v2/skyblock/profiles?uuid={uuid}"
+HYPIXEL_PROFILES_URL = "https://api.hypixel.net/v2/skyblock/profiles?uuid={uuid}"
+
+# what a key gets until the first response tells us the real numbers
+HYPIXEL_DEFAULT_LIMIT = 300
+HYPIXEL_DEFAULT_WINDOW = 300
+
+
+class ProfileBackend:
+    name = "base"
+
+    def is_available(self) -> bool:
+        return True
+
+    async def fetch(self, uuid: str) -> Optional[dict]:
+        raise NotImplementedError
+
+
+# the proxy we've always used, no key needed but it's someone else's worker
+class WorkerBackend(ProfileBackend):
+    name = "worker"
+
+    def __init__(self, url: str = WORKER_URL):
+        self.url = url
+
+    async def fetch(self, uuid: str) -> Optional[dict]:
+        log_debug("Requesting profile data from worker: %s", uuid)
+        return await get_json(self.name, self.url.format(uuid=uuid), timeout=15)
+
+
+class RateLimitBudget:
+    def __init__(self, limit: int = HYPIXEL_DEFAULT_LIMIT, window: float = HYPIXEL_DEFAULT_WINDOW):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset_at = time.monotonic() + window
+        self.in_flight = 0
+
+    def _roll(self):
+        now = time.monotonic()
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+
+    def available(self) -> bool:
+        self._roll()
+        return self.remaining > 0
+
+    def acquire(self) -> bool:
+        # no pacing on purpose, the whole budget can be spent in a burst and the
+        # next backend takes over until the window resets
+        self._roll()
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    def update(self, headers):
+        try:
+            limit = int(headers["RateLimit-Limit"])
+            remaining = int(headers["RateLimit-Remaining"])
+            reset = int(headers["RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        self.limit = limit
+        # the header already counts this request, but not the others still in flight
+        self.remaining = max(0, remaining - (self.in_flight - 1))
+        self.reset_at = time.monotonic() + reset
+
+    def seconds_until_reset(self) -> float:
+        return max(0.0, self.reset_at - time.monotonic())
+
+
+class HypixelBackend(ProfileBackend):
+    name = "hypixel"
+
+    def __init__(self, api_key: str, url: str = HYPIXEL_PROFILES_URL):
+        self.api_key = api_key
+        self.url = url
+        self.budget = RateLimitBudget()
+        self.disabled_reason = None
+
+    def is_available(self) -> bool:
+        # an open circuit would fail the request before it's sent, checked first so it doesn't cost key budget
+        return self.disabled_reason is None and get_breaker(self.name).would_allow() and self.budget.available()
+
+    async def fetch(self, uuid: str) -> Optional[dict]:
+        if not get_breaker(self.name).would_allow() or not self.budget.acquire():
+            return None
+        log_debug("Requesting profile data from Hypixel: %s (%d left)", uuid, self.budget.remaining)
+        try:
+            return await get_json(self.name, self.url.format(uuid=uuid), timeout=15,
+                                  headers={"API-Key": self.api_key}, on_response=self._on_response)
+        finally:
+            self.budget.release()
+
+    def _on_response(self, r):
+        self.budget.update(r.headers)
+        set_gauge("ratelimit_remaining", self.budget.remaining, backend=self.name)
+        if r.status == 403:
+            self.disabled_reason = "API key was rejected"
+            log_error("Hypixel rejected the API key, using the other profile backends until restart")
+
+
+# local json files named <uuid>.json, for tests and benchmarks that shouldn't touch the network
+class FixtureBackend(ProfileBackend):
+    name = "fixture"
+
+    def __init__(self, directory: str = PROFILE_FIXTURE_DIR):
+        self.directory = directory
+
+    async def fetch(self, uuid: str) -> Optional[dict]:
+        path = os.path.join(self.directory, f"{uuid}.json")
+        if not os.path.exists(path):
+            return None
+        return await asyncio.to_thread(self._read, path)
+
+    def _read(self, path: str) -> dict:
+        with open(path, 'rb') as f:
+            return loads(f.read())
+
+
+class ProfileBackendChain:
+    def __init__(self, backends: List[ProfileBackend]):
+        self.backends = backends
+
+    def get(self, name: str) -> Optional[ProfileBackend]:
+        return next((b for b in self.backends if b.name == name), None)
+
+    async def fetch(self, uuid: str) -> Optional[dict]:
+        # first backend that answers wins, anything unavailable or failing falls through to the next
+        for backend in self.backends:
+            if not backend.is_available():
+                inc("profile_backend_requests_total", backend=backend.name, result="skipped")
+                continue
+            data = await backend.fetch(uuid)
+            inc("profile_backend_requests_total", backend=backend.name, result="ok" if data else "failed")
+            if data:
+                return data
+        return None
+
+
+def build_backends(names: List[str]) -> List[ProfileBackend]:
+    backends = []
+    for name in names:
+        if name == "hypixel":
+            if not HYPIXEL_API_KEY:
+                log_info("No HYPIXEL_API_KEY set, skipping the hypixel profile backend")
+                continue
+            backends.append(HypixelBackend(HYPIXEL_API_KEY))
+        elif name == "worker":
+            backends.append(WorkerBackend())
+        elif name == "fixture":
+            backends.append(FixtureBackend())
+        else:
+            log_error(f"Unknown profile backend in PROFILE_BACKENDS: {name}")
+    return backends
+
+
+profile_backends = ProfileBackendChain(build_backends(PROFILE_BACKENDS))
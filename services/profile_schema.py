@@ -0,0 +1,78 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+CLASS_NAMES = ("archer", "berserk", "healer", "mage", "tank")
+
+CLASS_PERKS = {
+    "archer": "toxophilite",
+    "berserk": "unbridled_rage",
+    "healer": "heart_of_gold",
+    "mage": "cold_efficiency",
+    "tank": "diamond_in_the_rough",
+}
+
+TIER_TO_FLOOR = {
+    '1': "Floor 1 (Bonzo)",
+    '2': "Floor 2 (Scarf)",
+    '3': "Floor 3 (Professor)",
+    '4': "Floor 4 (Thorn)",
+    '5': "Floor 5 (Livid)",
+    '6': "Floor 6 (Sadan)",
+    '7': "Floor 7 (Necron)",
+}
+
+
+# only the fields we actually read, the raw profile payload is thrown away after decoding
+@dataclass(slots=True)
+class DungeonProfile:
+    uuid: str
+    cata_xp: float = 0.0
+    # classes present in the profile (in profile order), missing ones are left out
+    class_xp: Dict[str, float] = field(default_factory=dict)
+    class_boosts: Dict[str, float] = field(default_factory=dict)
+    normal_completions: Dict[str, int] = field(default_factory=dict)
+    master_completions: Dict[str, int] = field(default_factory=dict)
+
+    def get_class_xp(self) -> Dict[str, float]:
+        return {cls: self.class_xp.get(cls, 0.0) for cls in CLASS_NAMES}
+
+    def get_run_counts(self) -> Dict[str, Dict[str, int]]:
+        return {
+            floor_name: {
+                "normal": self.normal_completions.get(tier_key, 0),
+                "master": self.master_completions.get(tier_key, 0)
+            }
+            for tier_key, floor_name in TIER_TO_FLOOR.items()
+        }
+
+
+def _decode_completions(raw: dict) -> Dict[str, int]:
+    return {tier: int(count) for tier, count in raw.items() if tier in TIER_TO_FLOOR}
+
+
+def decode_profile(data: dict, uuid: str) -> Optional[DungeonProfile]:
+    profiles = data.get("profiles")
+    if not profiles:
+        return None
+
+    best_profile = next((p for p in profiles if p.get("selected")), profiles[0])
+    member = (best_profile.get("members") or {}).get(uuid) or {}
+    dungeons = member.get("dungeons") or {}
+    dungeon_types = dungeons.get("dungeon_types") or {}
+    catacombs = dungeon_types.get("catacombs") or {}
+    master_catacombs = dungeon_types.get("master_catacombs") or {}
+    player_classes = dungeons.get("player_classes") or {}
+    perks = (member.get("player_data") or {}).get("perks") or {}
+
+    return DungeonProfile(
+        uuid=uuid,
+        cata_xp=float(catacombs.get("experience", 0)),
+        class_xp={
+            cls: float(data["experience"])
+            for cls, data in player_classes.items()
+            if cls in CLASS_NAMES and "experience" in (data or {})
+        },
+        class_boosts={cls: perks.get(perk, 0) * 0.02 for cls, perk in CLASS_PERKS.items()},
+        normal_completions=_decode_completions(catacombs.get("tier_completions") or {}),
+        master_completions=_decode_completions(master_catacombs.get("tier_completions") or {})
+    )
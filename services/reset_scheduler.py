@@ -0,0 +1,77 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from core.config import RESET_REFRESH_WINDOW, RESET_REFRESH_CONCURRENCY, RESET_REFRESH_INTERVAL
+from core.logger import log_info, log_error
+from core.metrics import observe, set_gauge
+from services.daily_manager import daily_manager
+
+# in-flight profile requests are allowed to finish before midnight, matches the request timeout
+REFRESH_MARGIN = 15
+
+
+async def sleep_until(ts: float):
+    # short sleeps so a suspended host or a clock jump doesn't make us miss the boundary by much
+    while True:
+        remaining = ts - time.time()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(remaining, 60))
+
+
+class ResetScheduler:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.next_reset = 0
+        self.last_refresh: Optional[dict] = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        # the bot may have been down across a boundary, roll anything we missed before waiting for the next one
+        try:
+            await daily_manager.check_resets()
+        except Exception as e:
+            log_error(f"Startup reset check failed: {e}")
+
+        while True:
+            # every monthly reset is also a daily one, so midnight utc is the only boundary to wait for
+            self.next_reset, _ = daily_manager.get_reset_timestamps()
+            set_gauge("next_reset_timestamp", self.next_reset)
+            try:
+                await sleep_until(self.next_reset - RESET_REFRESH_WINDOW)
+                refresh = None
+                if time.time() < self.next_reset - REFRESH_MARGIN:
+                    refresh = asyncio.create_task(self._refresh(self.next_reset - REFRESH_MARGIN))
+
+                await sleep_until(self.next_reset)
+                if refresh:
+                    await refresh
+                await daily_manager.check_resets()
+                observe("reset_delay_ms", (time.time() - self.next_reset) * 1000)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_error(f"Reset scheduler failed: {e}")
+                await asyncio.sleep(60)
+
+    async def _refresh(self, deadline: float):
+        # everyone's xp as close to midnight as the rate limit allows, so yesterday gets the last few hours
+        log_info(f"Refreshing all players before the reset at {datetime.fromtimestamp(self.next_reset, timezone.utc):%Y-%m-%d %H:%M} UTC")
+        start = time.perf_counter()
+        try:
+            updated, errors, total = await daily_manager.force_update_all(
+                concurrency=RESET_REFRESH_CONCURRENCY, interval=RESET_REFRESH_INTERVAL, deadline=deadline
+            )
+        except Exception as e:
+            log_error(f"Pre-reset refresh failed: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        self.last_refresh = {"updated": updated, "errors": errors, "total": total, "seconds": elapsed}
+        log_info(f"Pre-reset refresh done in {elapsed:.0f}s: {updated}/{total} updated, {errors} errors")
+
+
+reset_scheduler = ResetScheduler()
@@ -1,26 +1,62 @@
-import json
+import asyncio
 import os
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 from core.logger import log_info, log_error, log_debug
+from core.metrics import inc
+from core.serializer import dumps, loads
+from core.storage import JsonStore
 
 DATA_FILE = "data/rng_data.json"
+JOURNAL_FILE = "data/rng_data.journal"
+JOURNAL_COMPACT_RECORDS = 500
+JOURNAL_COMPACT_INTERVAL = 300 # 5 minutes
+
+from core.config import RNG_DROPS, GLOBAL_DROPS, DROP_IDS, CHEST_COSTS
+
+
+def calculate_item_profit(item_name: str, prices: dict) -> Tuple[float, float, float]:
+    item_id = DROP_IDS.get(item_name)
+    price = float(prices.get(item_id, 0))
+    chest_cost = CHEST_COSTS.get(item_name, 0)
+    profit = max(0, price - chest_cost)
+    return price, chest_cost, profit
+
+
+def get_floor_items(floor_name: str) -> List[str]:
+    if floor_name == "Global":
+        return GLOBAL_DROPS
+    return RNG_DROPS.get(floor_name, [])
 
-from core.config import RNG_DROPS
 
 class RngManager:
     def __init__(self):
         self.data: Dict[str, Dict[str, Dict[str, int]]] = {}
-        self.load_data()
+        self.totals: Dict[str, dict] = {}
+        self.item_values: Dict[str, Tuple[float, float, float]] = {}
+        self.prices_version = None
+        self.store = JsonStore(DATA_FILE)
+        self.journal = None
+        self.journal_records = 0
+        self.last_compact = time.time()
+        self.compacting = False
+        self.loaded = False
 
-    def load_data(self):
-        if not os.path.exists(DATA_FILE):
+    async def initialize(self):
+        if self.loaded:
+            return
+        await self.load_data()
+        self.loaded = True
+
+    async def load_data(self):
+        if not self.store.exists():
             self.data = {}
             log_info("No RNG data file found, starting fresh.")
+            await self._replay_journal()
             return
         
         try:
-            with open(DATA_FILE, 'r') as f:
-                loaded_data = json.load(f)
+            loaded_data = await self.store.load()
                 
             self.data = {}
             migrated = False
@@ -55,21 +91,115 @@ class RngManager:
                 else:
                     self.data[user_id] = user_data
 
+            self.totals = {}
             if migrated:
                 log_info("Migrated RNG data from Profiles to Flat structure.")
-                self.save_data()
+                await self.save_data()
                 
             log_info(f"Loaded RNG data for {len(self.data)} users.")
         except Exception as e:
             log_error(f"Failed to load RNG data: {e}")
             self.data = {}
+            
+        await self._replay_journal()
+
+    def _read_journal(self) -> Tuple[List[dict], bool]:
+        # returns the good records and whether the file had anything else in it
+        records = []
+        dirty = False
+        with open(JOURNAL_FILE, 'rb') as f:
+            for line in f:
+                dirty = True
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(loads(line))
+                except ValueError:
+                    # torn write at the tail, everything before it is still good
+                    break
+        return records, dirty
+
+    async def _replay_journal(self):
+        if not os.path.exists(JOURNAL_FILE):
+            return
+        
+        try:
+            records, dirty = await asyncio.to_thread(self._read_journal)
+        except Exception as e:
+            log_error(f"Failed to replay RNG journal: {e}")
+            return
+        
+        for record in records:
+            section = self.data.setdefault(record["u"], {}).setdefault(record["s"], {})
+            section[record["k"]] = record["v"]
+        
+        if records:
+            log_info(f"Replayed {len(records)} RNG journal records.")
+            self.totals = {}
+        # a torn line left behind would swallow the next append, so anything in the file gets truncated,
+        # even when nothing in it could be read
+        if dirty:
+            await self.save_data()
+
+    def _snapshot(self) -> dict:
+        return {
+            user_id: {key: dict(value) if isinstance(value, dict) else value for key, value in user_data.items()}
+            for user_id, user_data in self.data.items()
+        }
+
+    def _reset_journal(self):
+        if self.journal:
+            self.journal.close()
+        self.journal = open(JOURNAL_FILE, 'wb')
+
+    def _write_journal(self, line: bytes):
+        if self.journal is None:
+            self.journal = open(JOURNAL_FILE, 'ab')
+        self.journal.write(line)
+        self.journal.flush()
 
-    def save_data(self):
+    async def save_data(self):
+        async with self.store.lock:
+            # snapshot under the lock: any record still queued behind us lands in the fresh journal
+            try:
+                await self.store.save_locked(self._snapshot())
+            except Exception as e:
+                log_error(f"Failed to save RNG data: {e}")
+                return
+            
+            # everything in the journal is in the main file now
+            try:
+                await asyncio.to_thread(self._reset_journal)
+            except Exception as e:
+                self.journal = None
+                log_error(f"Failed to reset RNG journal: {e}")
+            self.journal_records = 0
+            self.last_compact = time.time()
+
+    async def _append_journal(self, user_id: str, section: str, key: str, value):
+        # absolute values, so replaying a record twice is harmless
+        record = {"u": user_id, "s": section, "k": key, "v": value}
+        line = dumps(record) + b"\n"
         try:
-            with open(DATA_FILE, 'w') as f:
-                json.dump(self.data, f, indent=4)
+            async with self.store.lock:
+                await asyncio.to_thread(self._write_journal, line)
+                self.journal_records += 1
+            inc("file_save_bytes_total", len(line), file="rng_data.journal")
         except Exception as e:
-            log_error(f"Failed to save RNG data: {e}")
+            log_error(f"Failed to append RNG journal, saving full data: {e}")
+            await self.save_data()
+            return
+        
+        if self.compacting:
+            return
+        if self.journal_records >= JOURNAL_COMPACT_RECORDS or time.time() - self.last_compact >= JOURNAL_COMPACT_INTERVAL:
+            log_debug("Compacting RNG journal (%d records)", self.journal_records)
+            self.compacting = True
+            try:
+                await self.save_data()
+            finally:
+                self.compacting = False
 
     def get_user_stats(self, user_id: str) -> Dict[str, Dict[str, int]]:
         raw = self.data.get(user_id, {})
@@ -79,7 +209,67 @@ class RngManager:
         user_stats = self.get_user_stats(user_id)
         return user_stats.get(floor_name, {})
 
-    def update_drop(self, user_id: str, floor_name: str, item_name: str, change: int) -> int:
+    def sync_prices(self, prices: dict, version: int):
+        if version == self.prices_version:
+            return
+        
+        self.item_values = {}
+        for floor_name in list(RNG_DROPS.keys()) + ["Global"]:
+            for item_name in get_floor_items(floor_name):
+                self.item_values[item_name] = calculate_item_profit(item_name, prices)
+        self.prices_version = version
+        log_debug("Revalued RNG profits for price version %s", version)
+
+    def get_item_value(self, item_name: str) -> Tuple[float, float, float]:
+        return self.item_values.get(item_name, (0.0, 0.0, 0.0))
+
+    def get_item_profit(self, item_name: str) -> float:
+        return self.get_item_value(item_name)[2]
+
+    def get_totals(self, user_id: str, prices: dict, version: int) -> dict:
+        user_id = str(user_id)
+        self.sync_prices(prices, version)
+        
+        totals = self.totals.get(user_id)
+        if totals is None or totals["version"] != version:
+            totals = self._build_totals(user_id)
+            self.totals[user_id] = totals
+        return totals
+
+    def _build_totals(self, user_id: str) -> dict:
+        totals = {"version": self.prices_version, "floors": {}, "count": 0, "value": 0.0}
+        for floor_name, floor_stats in self.get_user_stats(user_id).items():
+            if not isinstance(floor_stats, dict):
+                continue
+            floor_count = 0
+            floor_value = 0.0
+            for item_name in get_floor_items(floor_name):
+                count = floor_stats.get(item_name, 0)
+                floor_count += count
+                floor_value += count * self.get_item_profit(item_name)
+            totals["floors"][floor_name] = {"count": floor_count, "value": floor_value}
+            totals["count"] += floor_count
+            totals["value"] += floor_value
+        return totals
+
+    def _apply_total_delta(self, user_id: str, floor_name: str, item_name: str, delta: int):
+        totals = self.totals.get(user_id)
+        if totals is None or delta == 0:
+            return
+        if totals["version"] != self.prices_version:
+            del self.totals[user_id]
+            return
+        if item_name not in get_floor_items(floor_name):
+            return
+        
+        value = delta * self.get_item_profit(item_name)
+        floor_totals = totals["floors"].setdefault(floor_name, {"count": 0, "value": 0.0})
+        floor_totals["count"] += delta
+        floor_totals["value"] += value
+        totals["count"] += delta
+        totals["value"] += value
+
+    async def update_drop(self, user_id: str, floor_name: str, item_name: str, change: int) -> int:
         user_id = str(user_id)
         if user_id not in self.data:
             self.data[user_id] = {}
@@ -94,12 +284,13 @@ class RngManager:
             new_count = 0
             
         self.data[user_id][floor_name][item_name] = new_count
-        self.save_data()
+        self._apply_total_delta(user_id, floor_name, item_name, new_count - current_count)
+        await self._append_journal(user_id, floor_name, item_name, new_count)
         
         log_info(f"Updated drop for {user_id}: {item_name} -> {new_count} (Change: {change})")
         return new_count
 
-    def set_drop_count(self, user_id: str, floor_name: str, item_name: str, count: int) -> int:
+    async def set_drop_count(self, user_id: str, floor_name: str, item_name: str, count: int) -> int:
         user_id = str(user_id)
         if user_id not in self.data:
             self.data[user_id] = {}
@@ -110,8 +301,10 @@ class RngManager:
         if count < 0:
             count = 0
             
+        current_count = self.data[user_id][floor_name].get(item_name, 0)
         self.data[user_id][floor_name][item_name] = count
-        self.save_data()
+        self._apply_total_delta(user_id, floor_name, item_name, count - current_count)
+        await self._append_journal(user_id, floor_name, item_name, count)
         
         log_info(f"Set drop for {user_id}: {item_name} -> {count}")
         return count
@@ -119,7 +312,7 @@ class RngManager:
     def get_default_target(self, user_id: str) -> Optional[str]:
         return self.data.get(user_id, {}).get("_settings", {}).get("default_target")
 
-    def set_default_target(self, user_id: str, target_id: str):
+    async def set_default_target(self, user_id: str, target_id: str):
         user_id = str(user_id)
         target_id = str(target_id)
         
@@ -130,7 +323,7 @@ class RngManager:
             self.data[user_id]["_settings"] = {}
             
         self.data[user_id]["_settings"]["default_target"] = target_id
-        self.save_data()
+        await self._append_journal(user_id, "_settings", "default_target", target_id)
         log_info(f"Set default target search for {user_id} to {target_id}")
 
 rng_manager = RngManager()
@@ -0,0 +1,67 @@
+import time
+from typing import Dict, List, Optional
+from core.config import DROP_CHANCES, RNG_SIM_PLAYERS, RNG_SIM_DEFAULT_RUNS
+from core.logger import log_debug
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# players are simulated this many at a time so a million of them doesn't need a gigabyte of counts
+CHUNK_PLAYERS = 100_000
+PROFIT_PERCENTILES = [5, 25, 50, 75, 95]
+FIRST_DROP_PERCENTILES = [50, 90]
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def simulate_floor(items: List[str], values: Dict[str, float], runs: int = None, actual_value: float = None,
+                   players: int = RNG_SIM_PLAYERS, seed: int = None) -> Optional[dict]:
+    # items without a known drop chance are left out, values are per-drop profits like the tracker uses
+    items = [item for item in items if DROP_CHANCES.get(item)]
+    if np is None or not items:
+        return None
+    runs = runs or RNG_SIM_DEFAULT_RUNS
+    start = time.perf_counter()
+
+    rng = np.random.default_rng(seed)
+    chances = np.array([DROP_CHANCES[item] for item in items])
+    profits = np.array([values.get(item, 0.0) for item in items])
+    profit_per_run = np.empty(players)
+    first_drop = np.empty((players, len(items)), dtype=np.int32)
+    for lo in range(0, players, CHUNK_PLAYERS):
+        hi = min(lo + CHUNK_PLAYERS, players)
+        # drops are independent per run, so a player's count of an item over all their runs is one binomial draw
+        counts = rng.binomial(runs, chances, size=(hi - lo, len(items)))
+        profit_per_run[lo:hi] = counts @ profits / runs
+        first_drop[lo:hi] = rng.geometric(chances, size=(hi - lo, len(items)))
+
+    bands = np.percentile(profit_per_run, PROFIT_PERCENTILES)
+    first = np.percentile(first_drop, FIRST_DROP_PERCENTILES, axis=0)
+    result = {
+        "runs": runs,
+        "players": players,
+        "expected": float(chances @ profits),
+        "mean": float(profit_per_run.mean()),
+        "bands": {p: float(v) for p, v in zip(PROFIT_PERCENTILES, bands)},
+        "first_drop": {
+            item: {p: int(first[i][j]) for i, p in enumerate(FIRST_DROP_PERCENTILES)}
+            for j, item in enumerate(items)
+        },
+        "actual": None,
+        "percentile": None,
+        # this runs on a worker thread, the caller records it as a metric back on the loop
+        "elapsed_ms": 0.0
+    }
+    if actual_value is not None:
+        actual = actual_value / runs
+        result["actual"] = actual
+        # ties count half, a lot of players on a short run count share the exact same (often zero) profit
+        result["percentile"] = float(((profit_per_run < actual).mean() + (profit_per_run == actual).mean() / 2) * 100)
+
+    result["elapsed_ms"] = (time.perf_counter() - start) * 1000
+    log_debug("Simulated %d players x %d runs for %d items in %.0fms", players, runs, len(items), result["elapsed_ms"])
+    return result
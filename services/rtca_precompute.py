@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from core.config import FLOOR_XP_MAP, XP_PER_RUN_DEFAULT, RTCA_DEFAULT_FLOOR
+from core.logger import log_debug, log_error
+from core.metrics import inc, set_gauge
+from core.storage import JsonStore
+from services.simulation_logic import simulate_to_level_all50, record_simulation, default_bonuses, build_bonuses, calculate_dungeon_xp_per_run
+
+# discord id -> the floor they last ran /rtca with, that's the one we keep warm for them
+RTCA_FLOORS_FILE = "data/rtca_floors.json"
+
+
+def make_entry(class_xp: dict, bonuses: dict, base_floor: float, xp_per_run: float, runs_total: int, results: dict,
+               milestones: dict, polled_at: int) -> dict:
+    return {
+        "class_xp": class_xp,
+        "bonuses": bonuses,
+        "base_floor": base_floor,
+        "xp_per_run": xp_per_run,
+        "runs_total": runs_total,
+        "results": results,
+        "milestones": milestones,
+        "polled_at": polled_at
+    }
+
+
+class RtcaPrecompute:
+    def __init__(self):
+        self.floors: Dict[str, str] = {}
+        self.store = JsonStore(RTCA_FLOORS_FILE)
+        self.loaded = False
+        # uuid -> floor -> finished default-bonus simulation, only kept in memory
+        self.results: Dict[str, Dict[str, dict]] = {}
+        # (uuid, floor) -> latest inputs waiting for the worker, a newer poll just replaces them
+        self.pending: Dict[Tuple[str, str], dict] = {}
+        self.worker: Optional[asyncio.Task] = None
+
+    async def initialize(self):
+        if self.loaded:
+            return
+        try:
+            self.floors = await self.store.load() or {}
+        except Exception as e:
+            log_error(f"Failed to load rtca floors: {e}")
+            self.floors = {}
+        self.loaded = True
+
+    async def remember_floor(self, user_id: int, floor: str):
+        user_id = str(user_id)
+        if self.floors.get(user_id) == floor:
+            return
+        self.floors[user_id] = floor
+        try:
+            await self.store.save(dict(self.floors))
+        except Exception as e:
+            log_error(f"Failed to save rtca floors: {e}")
+
+    def has_results(self, uuid: str) -> bool:
+        return uuid in self.results
+
+    def forget(self, uuid: str):
+        self.results.pop(uuid, None)
+        for key in [key for key in self.pending if key[0] == uuid]:
+            del self.pending[key]
+        set_gauge("rtca_precompute_pending", len(self.pending))
+
+    def schedule(self, uuid: str, user_ids: Iterable[str], class_xp: dict, class_boosts: dict):
+        if not class_xp:
+            return
+        for floor in {self.floors.get(user_id, RTCA_DEFAULT_FLOOR) for user_id in user_ids}:
+            self.pending[(uuid, floor)] = {"class_xp": dict(class_xp), "class_boosts": dict(class_boosts), "polled_at": int(time.time())}
+        set_gauge("rtca_precompute_pending", len(self.pending))
+        if self.pending and (self.worker is None or self.worker.done()):
+            self.worker = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        # daily_manager imports us, so it can only be looked up once both modules are loaded
+        from services.daily_manager import daily_manager
+        # one simulation at a time on a worker thread, the loop keeps serving interactions while it runs.
+        # the gil is still shared though, so a big poll means a few slower commands rather than none at all
+        while self.pending:
+            key = next(iter(self.pending))
+            inputs = self.pending.pop(key)
+            set_gauge("rtca_precompute_pending", len(self.pending))
+            try:
+                entry, elapsed_ms = await asyncio.to_thread(self._compute, key[1], inputs)
+            except Exception as e:
+                log_error(f"Failed to precompute rtca for {key[0]} on {key[1]}: {e}")
+                continue
+            record_simulation(elapsed_ms, entry["runs_total"])
+            # the last subscriber may have left while this was running
+            if key[0] not in daily_manager.subscribers:
+                continue
+            self.put(key[0], key[1], entry)
+            inc("rtca_precomputed_total")
+        log_debug("Precomputed rtca results, %d players warm", len(self.results))
+
+    def _compute(self, floor: str, inputs: dict) -> Tuple[dict, float]:
+        base_floor = FLOOR_XP_MAP.get(floor, XP_PER_RUN_DEFAULT)
+        bonuses = build_bonuses(inputs["class_boosts"])
+        xp_per_run = calculate_dungeon_xp_per_run(base_floor, bonuses["ring"], bonuses["hecatomb"], bonuses["global"], bonuses["mayor"])
+        start = time.perf_counter()
+        runs_total, results, milestones = simulate_to_level_all50(inputs["class_xp"], base_floor, bonuses, record_metrics=False)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return make_entry(inputs["class_xp"], bonuses, base_floor, xp_per_run, runs_total, results, milestones, inputs["polled_at"]), elapsed_ms
+
+    def put(self, uuid: str, floor: str, entry: dict):
+        self.results.setdefault(uuid, {})[floor] = entry
+
+    def get(self, uuid: str, floor: str) -> Optional[dict]:
+        entry = self.results.get(uuid, {}).get(floor)
+        if entry is None:
+            inc("rtca_precompute_lookups_total", result="miss")
+            return None
+        # /setdefault changed the defaults since, the stored run used the old ones
+        if any(entry["bonuses"][k] != v for k, v in default_bonuses.items()):
+            del self.results[uuid][floor]
+            inc("rtca_precompute_lookups_total", result="stale")
+            return None
+        inc("rtca_precompute_lookups_total", result="hit")
+        return entry
+
+
+rtca_precompute = RtcaPrecompute()
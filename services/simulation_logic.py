@@ -1,20 +1,54 @@
+import math
 import time
-from core.logger import log_info, log_debug
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+from core.logger import log_info, log_debug, debug_enabled
+from core.metrics import inc, observe
 from services.xp_calculations import get_dungeon_level, get_total_xp_for_level
 from core.config import TARGET_LEVEL
 
+default_bonuses = {
+    "ring": 0.1,
+    "hecatomb": 0.02,
+    "scarf_accessory": 0.06,
+    "scarf_attribute": 0.2,
+    "global": 1.0,
+    "mayor": 1.0
+}
 
-def simulate_to_level_all50(dungeon_classes: dict, floor_xp: float, bonuses: dict,
-                            target_level: int = TARGET_LEVEL, max_runs: int = 200000):
-    start_time = time.perf_counter()
-    log_info("▶ Starting simulation...")
-    log_debug(f"Initial XP: {dungeon_classes}")
-    log_debug(f"Bonuses: {bonuses}")
+def calculate_dungeon_xp_per_run(base_floor: float, ring: float, hecatomb: float, global_mult: float, mayor_mult: float) -> float:
+    if base_floor >= 15000:
+        maxcomps = 26
+    elif base_floor == 4880:
+        maxcomps = 51
+    else:
+        maxcomps = 76
+    
+    if ring > 0 and mayor_mult > 1:
+        cataperrun = base_floor * (0.95 + ((mayor_mult - 1) + (maxcomps - 1) / 100) + ring + hecatomb + (maxcomps - 1) * (0.024 + hecatomb / 50))
+    elif ring > 0:
+        cataperrun = base_floor * (0.95 + ring + hecatomb + (maxcomps - 1) * (0.024 + hecatomb / 50))
+    else:
+        cataperrun = base_floor * (0.95 + hecatomb + (maxcomps - 1) * (0.022 + hecatomb / 50))
+    
+    cataperrun *= global_mult
+    return math.ceil(cataperrun)
 
-    classes = {k: float(v) for k, v in dungeon_classes.items()}
-    runs_done = {k: 0 for k in classes}
-    runs = 0
 
+# what /rtca simulates with when nobody picked anything, /setdefault changes default_bonuses in place
+def build_bonuses(class_boosts: dict) -> dict:
+    return {
+        "ring": default_bonuses["ring"],
+        "hecatomb": default_bonuses["hecatomb"],
+        "scarf_accessory": default_bonuses["scarf_accessory"],
+        "scarf_attribute": default_bonuses["scarf_attribute"],
+        "global": default_bonuses["global"],
+        "mayor": default_bonuses["mayor"],
+        "class_boosts": class_boosts
+    }
+
+
+def get_per_class_base(classes: Iterable[str], floor_xp: float, bonuses: dict) -> Dict[str, float]:
     hecatomb = bonuses.get("hecatomb", 0.02)
     scarf_accessory = bonuses.get("scarf_accessory", 0.06)
     scarf_attribute = bonuses.get("scarf_attribute", 0.2)
@@ -23,21 +57,44 @@ def simulate_to_level_all50(dungeon_classes: dict, floor_xp: float, bonuses: dic
     class_boosts = bonuses.get("class_boosts", {})
     
     per_class_base = {}
-    for cls in classes.keys():
+    for cls in classes:
         boost = class_boosts.get(cls, 0.0)
         base = floor_xp * (1.0 + (hecatomb * 2) + boost + scarf_accessory + scarf_attribute) * global_mult * mayor_mult
         per_class_base[cls] = base
+    return per_class_base
+
 
-    log_debug(f"Base XP per run: {per_class_base}")
-    log_debug(f"Bonuses used: hecatomb={hecatomb} (x2={hecatomb*2}), scarf_accessory={scarf_accessory}, scarf_attribute={scarf_attribute}, global={global_mult}, mayor={mayor_mult}")
-    log_debug(f"Class boosts: {class_boosts}")
+def record_simulation(elapsed_ms: float, runs: int):
+    observe("simulation_ms", elapsed_ms)
+    inc("simulated_runs_total", runs)
+
+
+def simulate_to_level_all50(dungeon_classes: dict, floor_xp: float, bonuses: dict,
+                            target_level: int = TARGET_LEVEL, max_runs: int = 200000, record_metrics: bool = True):
+    # callers on a worker thread pass record_metrics=False and record them back on the loop, the metrics
+    # dicts aren't safe to change while /perf is iterating them
+    start_time = time.perf_counter()
+    log_info("▶ Starting simulation...")
+    log_debug("Initial XP: %s", dungeon_classes)
+    log_debug("Bonuses: %s", bonuses)
+
+    classes = {k: float(v) for k, v in dungeon_classes.items()}
+    runs_done = {k: 0 for k in classes}
+    # run numbers each class was picked on, enough to rebuild the xp at any run for the milestones
+    picks = {k: [] for k in classes}
+    runs = 0
+
+    per_class_base = get_per_class_base(classes, floor_xp, bonuses)
+
+    log_debug("Base XP per run: %s", per_class_base)
 
     target_xp = get_total_xp_for_level(target_level)
     
     classxpsleft = {c: max(target_xp - classes[c], 0) for c in classes}
+    start_xp = {c: target_xp - classxpsleft[c] for c in classes}
     
-    log_debug(f"Target XP for level {target_level}: {target_xp}")
-    log_debug(f"Initial remaining XP: {classxpsleft}")
+    log_debug("Target XP for level %s: %s", target_level, target_xp)
+    log_debug("Initial remaining XP: %s", classxpsleft)
 
     while runs < max_runs:
         allnegative = True
@@ -64,18 +121,21 @@ def simulate_to_level_all50(dungeon_classes: dict, floor_xp: float, bonuses: dic
             if c == maxindex:
                 classxpsleft[c] -= per_class_base[c]
                 runs_done[c] += 1
+                picks[c].append(runs)
             else:
                 classxpsleft[c] -= per_class_base[c] * 0.25
         
         for c in classes:
             classes[c] = target_xp - classxpsleft[c]
 
-        if runs % 5000 == 0:
+        if runs % 5000 == 0 and debug_enabled():
             avg_lvl = {c: round(get_dungeon_level(xp), 2) for c, xp in classes.items()}
-            log_debug(f"#{runs:,} runs → levels: {avg_lvl}")
+            log_debug("#%s runs → levels: %s", f"{runs:,}", avg_lvl)
 
     elapsed = time.perf_counter() - start_time
-    log_debug(f"🏁 Simulation completed after {runs:,} runs ({elapsed*1000:.2f}ms)")
+    log_debug("🏁 Simulation completed after %s runs (%.2fms)", runs, elapsed * 1000)
+    if record_metrics:
+        record_simulation(elapsed * 1000, runs)
 
     results = {}
     for c, xp in classes.items():
@@ -89,4 +149,157 @@ def simulate_to_level_all50(dungeon_classes: dict, floor_xp: float, bonuses: dic
             "runs_done": runs_done.get(c, 0)
         }
 
-    return runs, results
+    milestones = find_milestones(start_xp, per_class_base, picks, runs, target_level)
+    return runs, results, milestones
+
+
+def find_milestones(start_xp: Dict[str, float], per_class_base: Dict[str, float], picks: Dict[str, List[int]],
+                    runs: int, target_level: int) -> dict:
+    # every class gains a quarter of its base each run plus the other three quarters on the runs it was picked,
+    # so its xp after run r is start + base * (r/4 + 3/4 * picks up to r). that only ever grows with r,
+    # which lets each milestone be found with a bisect instead of tracking levels inside the simulation loop
+    thresholds = [get_total_xp_for_level(level) for level in range(target_level + 1)]
+
+    def xp_at(c: str, run: int) -> float:
+        return start_xp[c] + per_class_base[c] * (0.25 * run + 0.75 * bisect_right(picks[c], run))
+
+    def level_at(xp: float) -> float:
+        # unrounded and capped at the target, the class average only counts levels up to it
+        if xp >= thresholds[-1]:
+            return float(target_level)
+        i = bisect_right(thresholds, xp) - 1
+        return i + (xp - thresholds[i]) / (thresholds[i + 1] - thresholds[i])
+
+    def first_run(reached, lo: int) -> int:
+        # None when the simulation hit max_runs before getting there
+        if not reached(runs):
+            return None
+        hi = runs
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if reached(mid):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    milestones = {"classes": {}, "average": {}}
+    for c in start_xp:
+        crossed = {}
+        lo = 0
+        for level in range(bisect_right(thresholds, start_xp[c]), target_level + 1):
+            run = first_run(lambda run: xp_at(c, run) >= thresholds[level], lo)
+            if run is None:
+                break
+            crossed[level] = lo = run
+        milestones["classes"][c] = crossed
+
+    if start_xp:
+        def average_at(run: int) -> float:
+            return sum(level_at(xp_at(c, run)) for c in start_xp) / len(start_xp)
+
+        lo = 0
+        for level in range(math.floor(average_at(0)) + 1, target_level + 1):
+            run = first_run(lambda run: average_at(run) >= level - 1e-9, lo)
+            if run is None:
+                break
+            milestones["average"][level] = lo = run
+    return milestones
+
+
+def solve_fluid(remaining: Dict[str, float], rates: Dict[str, float],
+                max_runs: float = None) -> Tuple[float, Dict[str, float], Dict[str, float]]:
+    # the simulation always plays the class with the most xp left. once several classes are level on xp left
+    # it keeps swapping between them, so over many runs they come down together. instead of stepping run by
+    # run this jumps from one event (a class catching up, or everyone finishing) to the next.
+    # for the set S of classes level at the top, each picked on a share f_c of runs, every one of them has to
+    # come down at the same speed v:  a_c * (0.25 + 0.75 * f_c) = v  and  sum(f_c) = 1, which gives
+    #   v = (0.75 + 0.25 * |S|) / sum(1 / a_c)   and   f_c = (v / a_c - 0.25) / 0.75
+    # returns the (fractional) number of runs, how many of them each class was picked for and the xp each class
+    # still has left, stopping early at max_runs. the cost is per event, not per run
+    picked = {c: 0.0 for c in remaining}
+    top = max(remaining.values(), default=0)
+    if top <= 0:
+        return 0.0, picked, dict(remaining)
+
+    level = top
+    leaders = {c for c, r in remaining.items() if r >= top * (1 - 1e-12)}
+    others = {c: r for c, r in remaining.items() if c not in leaders}
+    runs = 0.0
+
+    while True:
+        while True:
+            speed = (0.75 + 0.25 * len(leaders)) / sum(1 / rates[c] for c in leaders)
+            # a class whose quarter share alone beats that speed can't stay level, it drops behind
+            fastest = max(leaders, key=lambda c: rates[c])
+            if len(leaders) == 1 or speed >= 0.25 * rates[fastest]:
+                break
+            leaders.discard(fastest)
+            others[fastest] = level
+
+        step = level / speed
+        joining = None
+        for c, r in others.items():
+            closing = speed - 0.25 * rates[c]
+            if closing > 0 and r > 0:
+                catch_up = (level - r) / closing
+                if catch_up < step:
+                    step, joining = catch_up, c
+
+        if max_runs is not None and runs + step >= max_runs:
+            step, joining = max_runs - runs, None
+        runs += step
+        level -= speed * step
+        for c in leaders:
+            picked[c] += (speed / rates[c] - 0.25) / 0.75 * step
+        for c in others:
+            others[c] -= 0.25 * rates[c] * step
+
+        if joining is None:
+            return runs, picked, {**others, **{c: level for c in leaders}}
+        del others[joining]
+        leaders.add(joining)
+
+
+def estimate_all_floors(dungeon_classes: dict, bonuses: dict, floors: Dict[str, float],
+                        target_level: int = TARGET_LEVEL) -> Dict[str, dict]:
+    # every rate is proportional to the floor's base xp, so one solve at base xp 1 answers every floor
+    start_time = time.perf_counter()
+    target_xp = get_total_xp_for_level(target_level)
+    remaining = {c: max(target_xp - float(xp), 0) for c, xp in dungeon_classes.items()}
+    unit_runs, unit_picked, _ = solve_fluid(remaining, get_per_class_base(remaining, 1.0, bonuses))
+
+    estimates = {}
+    for floor, floor_xp in floors.items():
+        estimates[floor] = {
+            "base_xp": floor_xp,
+            "runs": math.ceil(unit_runs / floor_xp - 1e-9),
+            "runs_done": {c: round(picked / floor_xp) for c, picked in unit_picked.items()}
+        }
+    observe("floor_estimate_ms", (time.perf_counter() - start_time) * 1000)
+    return estimates
+
+
+def project_runs(dungeon_classes: dict, floor_xp: float, bonuses: dict, run_budget: int,
+                 target_level: int = TARGET_LEVEL) -> dict:
+    # the other direction: where a player ends up after run_budget runs of the same policy
+    target_xp = get_total_xp_for_level(target_level)
+    remaining = {c: max(target_xp - float(xp), 0) for c, xp in dungeon_classes.items()}
+    runs, picked, left = solve_fluid(remaining, get_per_class_base(remaining, floor_xp, bonuses), max_runs=run_budget)
+
+    classes = {}
+    for c in remaining:
+        xp = target_xp - left[c]
+        classes[c] = {"level": get_dungeon_level(xp), "xp": xp, "runs_done": round(picked[c])}
+    return {
+        "runs": math.ceil(runs - 1e-9),
+        # everyone hit the target before the budget ran out, the rest of it isn't needed
+        "finished": runs < run_budget,
+        "average": sum(min(info["level"], target_level) for info in classes.values()) / len(classes) if classes else 0.0,
+        "classes": classes
+    }
+
+
+def runs_until(target_ts: float, runs_per_day: float, now: float = None) -> int:
+    days = max(0.0, target_ts - (time.time() if now is None else now)) / 86400
+    return int(days * runs_per_day)
@@ -0,0 +1,81 @@
+import aiohttp
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from core.circuit_breaker import CircuitBreaker
+from core.logger import log_debug, log_error
+from core.serializer import loads
+
+# cloudflare bypass, i hate i even have to do this
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 6.2; WOW64; x64; rv:135.0) Gecko/20100101 Firefox/135.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Sec-Fetch-User": "?1",
+}
+
+# one per upstream host, created on first use
+breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    breaker = breakers.get(upstream)
+    if breaker is None:
+        breaker = breakers[upstream] = CircuitBreaker(upstream)
+    return breaker
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def get_json(upstream: str, url: str, timeout: float, headers: dict = HEADERS,
+                   on_response: Optional[Callable[[aiohttp.ClientResponse], None]] = None):
+    # None on any failure, callers fall back to cached data where they have it.
+    # on_response sees the status and headers of every response that comes back
+    breaker = get_breaker(upstream)
+    if not breaker.allow():
+        log_debug("%s circuit open, failing fast (retry in %.0fs)", upstream, breaker.retry_in(), sample=20)
+        return None
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                if on_response:
+                    on_response(r)
+                if r.status != 200:
+                    try:
+                        text = await r.text()
+                        log_error(f"{upstream} request failed ({r.status}): {text[:200]}")
+                    except Exception:
+                        log_error(f"{upstream} request failed ({r.status})")
+                    if r.status == 429 or r.status >= 500:
+                        breaker.record_failure(parse_retry_after(r.headers.get("Retry-After")), rate_limited=r.status == 429)
+                    else:
+                        # a 404 for an unknown player still means the upstream is up
+                        breaker.record_success()
+                    return None
+                data = await r.json(loads=loads)
+                breaker.record_success()
+                return data
+    except asyncio.TimeoutError:
+        log_error(f"{upstream} request timed out ({timeout:.0f}s)")
+    except (aiohttp.ClientError, ValueError) as e:
+        log_error(f"{upstream} request failed: {e}")
+    breaker.record_failure()
+    return None